@@ -20,6 +20,33 @@ import {
 
 const backendUrl = process.env.REACT_APP_BACKEND_URL;
 
+// Only hosts the backend proxy allowlists (MEDIA_ALLOWED_HOSTS) go through it;
+// anything else, or a proxy error, loads the original image.
+const mediaHosts = new Set(
+  (process.env.REACT_APP_MEDIA_ALLOWED_HOSTS || "")
+    .split(",")
+    .map((h) => h.trim().toLowerCase())
+    .filter(Boolean)
+);
+
+const mediaUrl = (src, width) => {
+  if (!src) return src;
+  try {
+    if (!mediaHosts.has(new URL(src).hostname.toLowerCase())) return src;
+  } catch {
+    return src;
+  }
+  return `${backendUrl}/api/media/image?url=${encodeURIComponent(src)}&w=${width}`;
+};
+
+const fallbackToSource = (src) => (e) => {
+  const img = e.currentTarget;
+  if (src && !img.dataset.fallback) {
+    img.dataset.fallback = "1";
+    img.src = src;
+  }
+};
+
 const statusColors = {
   approved: "bg-emerald-500/15 text-emerald-300",
   live: "bg-sky-500/15 text-sky-300",
@@ -620,7 +647,8 @@ const LaunchDetailPage = () => {
             >
               {heroImage && (
                 <img
-                  src={heroImage}
+                  src={mediaUrl(heroImage, 1300)}
+                  onError={fallbackToSource(heroImage)}
                   alt={project.name}
                   className="h-full w-full object-cover"
                   data-testid="launch-detail-hero-image"
@@ -654,7 +682,8 @@ const LaunchDetailPage = () => {
                       data-testid="launch-detail-logo-wrapper"
                     >
                       <img
-                        src={project.logo_url}
+                        src={mediaUrl(project.logo_url, 160)}
+                        onError={fallbackToSource(project.logo_url)}
                         alt={`${project.name} logo`}
                         className="h-full w-full object-cover"
                         data-testid="launch-detail-logo-image"
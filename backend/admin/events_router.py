@@ -0,0 +1,54 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from pymongo import DESCENDING
+
+from backend.db import get_db
+from backend.events import ORDER_HISTORY_PROJECTION
+from backend.models import Event, EventType, OrderHistoryEntry
+from backend.router import get_current_admin
+
+router = APIRouter(prefix="/admin/events", tags=["admin-events"])
+
+
+@router.get("/orders/{order_id}/history", response_model=List[OrderHistoryEntry])
+async def get_order_history(
+    order_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    admin: dict = Depends(get_current_admin),
+):
+    db = get_db()
+    cursor = (
+        db.events
+        .find({"type": EventType.order_status.value, "entity_id": order_id}, ORDER_HISTORY_PROJECTION)
+        .sort("timestamp", DESCENDING)
+        .skip(skip)
+        .limit(limit)
+        .hint("order_history_covering")
+    )
+    return [OrderHistoryEntry(**doc) async for doc in cursor]
+
+
+@router.get("", response_model=List[Event])
+async def list_events(
+    type: Optional[EventType] = None,
+    actor_id: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    admin: dict = Depends(get_current_admin),
+):
+    db = get_db()
+    query = {}
+    if type:
+        query["type"] = type.value
+    if actor_id:
+        query["actor_id"] = actor_id
+    if entity_type:
+        query["entity_type"] = entity_type
+    if entity_id:
+        query["entity_id"] = entity_id
+    cursor = db.events.find(query, {"_id": 0}).sort("timestamp", DESCENDING).skip(skip).limit(limit)
+    return [Event(**doc) async for doc in cursor]
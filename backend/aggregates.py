@@ -0,0 +1,353 @@
+import os
+import asyncio
+import bisect
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+
+from backend.db import get_client, get_db
+from backend.models import OrderStatus
+from backend.pubsub import pubsub
+from backend.router import get_current_admin
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/leaderboard", tags=["leaderboard"])
+admin_router = APIRouter(prefix="/admin/leaderboard", tags=["admin-leaderboard"])
+
+LOYALTY_POINTS_PER_UNIT_SPENT = float(os.environ.get("LOYALTY_POINTS_PER_UNIT_SPENT", 1))
+LOYALTY_POINTS_PER_UNIT_CLAIMED = float(os.environ.get("LOYALTY_POINTS_PER_UNIT_CLAIMED", 0))
+RECONCILE_HOUR_UTC = int(os.environ.get("RECONCILE_HOUR_UTC", 3))
+
+METRICS = ("total_spent", "total_staked", "loyalty_points")
+# Per-user spend is private; only admins can list or rank by it.
+PUBLIC_METRICS = ("total_staked", "loyalty_points")
+
+# Once an order reaches any of these it has been paid for and counts towards
+# total_spent; moving between them (completed -> shipped -> delivered) must
+# neither credit nor drop the spend.
+PAID_ORDER_STATUSES = [OrderStatus.completed.value, OrderStatus.shipped.value, OrderStatus.delivered.value]
+
+
+# ----------------------
+# Leaderboard
+# ----------------------
+class Leaderboard:
+    """Users ordered by one metric: O(log n) rank lookups, O(k) top-k.
+
+    Kept as a sorted list of (-score, user_id) plus a score map; an update
+    is two bisects and a list memmove.
+    """
+
+    def __init__(self):
+        self._order: List[Tuple[float, str]] = []
+        self._scores: Dict[str, float] = {}
+
+    def load(self, scores: Dict[str, float]):
+        self._scores = dict(scores)
+        self._order = sorted((-s, uid) for uid, s in self._scores.items())
+
+    def update(self, user_id: str, score: float):
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            i = bisect.bisect_left(self._order, (-old, user_id))
+            if i < len(self._order) and self._order[i] == (-old, user_id):
+                del self._order[i]
+        self._scores[user_id] = score
+        bisect.insort(self._order, (-score, user_id))
+
+    def top(self, n: int, offset: int = 0) -> List[Tuple[str, float]]:
+        return [(uid, -neg) for neg, uid in self._order[offset:offset + n]]
+
+    def rank(self, user_id: str) -> Optional[int]:
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return bisect.bisect_left(self._order, (-score, "")) + 1
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+leaderboards: Dict[str, Leaderboard] = {m: Leaderboard() for m in METRICS}
+
+_USER_PROJECTION = {"_id": 1, **{m: 1 for m in METRICS}}
+
+
+def _apply_user_doc(doc: Optional[dict]):
+    if not doc:
+        return
+    uid = str(doc["_id"])
+    for metric in METRICS:
+        leaderboards[metric].update(uid, float(doc.get(metric) or 0))
+
+
+def publish_user(doc: Optional[dict]):
+    """Apply a post-update user doc locally and broadcast it; call only after the write commits."""
+    _apply_user_doc(doc)
+    if doc:
+        pubsub.publish("aggregates", {"_id": str(doc["_id"]), **{m: doc.get(m) or 0 for m in METRICS}})
+
+
+async def _on_aggregates_changed(data: dict):
+    _apply_user_doc(data)
+
+
+pubsub.subscribe("aggregates", _on_aggregates_changed)
+
+
+async def load_leaderboards():
+    db = get_db()
+    docs = await db.users.find({}, _USER_PROJECTION).to_list(None)
+    for metric in METRICS:
+        leaderboards[metric].load({str(d["_id"]): float(d.get(metric) or 0) for d in docs})
+    logger.info("Leaderboards loaded for %d users", len(docs))
+
+
+async def ensure_aggregate_indexes():
+    db = get_db()
+    for metric in METRICS:
+        await db.users.create_index([(metric, DESCENDING)])
+    await db.orders.create_index([("user_id", 1), ("status", 1)])
+    await db.staking_positions.create_index([("user_id", 1), ("status", 1)])
+
+
+# ----------------------
+# Incremental updates
+# ----------------------
+def _points(amount: float, rate: float) -> int:
+    return int(amount * rate)
+
+
+async def complete_order(order_id: str) -> bool:
+    """Mark an order completed and credit the buyer in one transaction.
+
+    The status guard makes this idempotent: a second call, or a call on an
+    order already shipped/delivered, finds nothing to update and credits
+    nothing. The order status route must go through here for total_spent
+    to move between reconciliation runs.
+    """
+    db = get_db()
+    async with await get_client().start_session() as session:
+        async with session.start_transaction():
+            order = await db.orders.find_one_and_update(
+                {"_id": order_id, "status": {"$nin": PAID_ORDER_STATUSES}},
+                {"$set": {"status": OrderStatus.completed.value, "updated_at": datetime.utcnow().isoformat()}},
+                projection={"user_id": 1, "pricing.total": 1},
+                session=session,
+            )
+            if not order:
+                return False
+            total = float(order["pricing"]["total"])
+            user = await db.users.find_one_and_update(
+                {"_id": order["user_id"]},
+                {"$inc": {
+                    "total_spent": total,
+                    "loyalty_points": _points(total, LOYALTY_POINTS_PER_UNIT_SPENT),
+                }},
+                projection=_USER_PROJECTION,
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+    publish_user(user)
+    return True
+
+
+async def apply_stake_delta(user_id: str, amount: float, session=None) -> Optional[dict]:
+    """+amount on stake, -amount on unstake, inside the caller's transaction.
+
+    Returns the post-update user doc; the caller passes it to publish_user()
+    once the transaction has committed.
+    """
+    return await get_db().users.find_one_and_update(
+        {"_id": user_id},
+        {"$inc": {"total_staked": amount}},
+        projection=_USER_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+
+
+async def apply_claim(user_id: str, claimed_before: float, claimed_after: float, session=None) -> Optional[dict]:
+    """Credit loyalty points for a claim, given the position's cumulative claimed amount.
+
+    Points are floored per position rather than per claim so the nightly
+    reconciliation can recompute them exactly. Like apply_stake_delta(),
+    the caller publishes the returned doc after commit.
+    """
+    points = (_points(claimed_after, LOYALTY_POINTS_PER_UNIT_CLAIMED)
+              - _points(claimed_before, LOYALTY_POINTS_PER_UNIT_CLAIMED))
+    if not points:
+        return None
+    return await get_db().users.find_one_and_update(
+        {"_id": user_id},
+        {"$inc": {"loyalty_points": points}},
+        projection=_USER_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+        session=session,
+    )
+
+
+# ----------------------
+# Drift reconciliation
+# ----------------------
+async def reconcile_user_aggregates() -> int:
+    """Recompute aggregates from orders and staking positions; fix and log any drift.
+
+    Users are read before the source aggregations and each fix is
+    conditional on the user doc still holding the values read. An order or
+    stake landing mid-run changes the doc, so that user is skipped until the
+    next run instead of having the concurrent increment overwritten.
+    """
+    db = get_db()
+    users = await db.users.find({}, _USER_PROJECTION).to_list(None)
+    # Points are floored per order and per position, exactly as credited.
+    spent = {
+        d["_id"]: d async for d in db.orders.aggregate([
+            {"$match": {"status": {"$in": PAID_ORDER_STATUSES}}},
+            {"$group": {
+                "_id": "$user_id",
+                "total": {"$sum": "$pricing.total"},
+                "points": {"$sum": {"$floor": {"$multiply": ["$pricing.total", LOYALTY_POINTS_PER_UNIT_SPENT]}}},
+            }},
+        ])
+    }
+    staked = {
+        d["_id"]: d["total"] async for d in db.staking_positions.aggregate([
+            {"$match": {"status": "active"}},
+            {"$group": {"_id": "$user_id", "total": {"$sum": "$amount"}}},
+        ])
+    }
+    claim_points = {
+        d["_id"]: d["points"] async for d in db.staking_positions.aggregate([
+            {"$group": {
+                "_id": "$user_id",
+                "points": {"$sum": {"$floor": {"$multiply": [{"$ifNull": ["$claimed", 0]}, LOYALTY_POINTS_PER_UNIT_CLAIMED]}}},
+            }},
+        ])
+    }
+
+    ops = []
+    for user in users:
+        uid = user["_id"]
+        orders = spent.get(uid, {})
+        expected = {
+            "total_spent": float(orders.get("total", 0)),
+            "total_staked": float(staked.get(uid, 0)),
+            "loyalty_points": int(orders.get("points", 0) + claim_points.get(uid, 0)),
+        }
+        drift = {m: (user.get(m) or 0, v) for m, v in expected.items() if abs((user.get(m) or 0) - v) > 1e-6}
+        if drift:
+            logger.warning("Aggregate drift for user %s: %s", uid, drift)
+            observed = {m: user.get(m) for m in METRICS}
+            ops.append(UpdateOne({"_id": uid, **observed}, {"$set": expected}))
+
+    fixed = 0
+    if ops:
+        result = await db.users.bulk_write(ops, ordered=False)
+        fixed = result.modified_count
+        if fixed < len(ops):
+            logger.info("Skipped %d users updated during reconciliation", len(ops) - fixed)
+        await load_leaderboards()
+        pubsub.publish("aggregates_reload")
+    return fixed
+
+
+async def _on_aggregates_reload(data: dict):
+    await load_leaderboards()
+
+
+pubsub.subscribe("aggregates_reload", _on_aggregates_reload)
+
+
+async def _acquire_daily_lock(name: str, now: datetime) -> bool:
+    """Only one worker (or host) runs the job per day."""
+    day = now.strftime("%Y-%m-%d")
+    result = await get_db().job_locks.update_one(
+        {"_id": name, "day": {"$ne": day}},
+        {"$set": {"day": day, "pid": os.getpid(), "at": now.isoformat()}},
+    )
+    if result.modified_count:
+        return True
+    try:
+        await get_db().job_locks.insert_one({"_id": name, "day": day, "pid": os.getpid(), "at": now.isoformat()})
+        return True
+    except Exception:
+        return False
+
+
+async def reconcile_loop():
+    while True:
+        now = datetime.now(timezone.utc)
+        next_run = now.replace(hour=RECONCILE_HOUR_UTC, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        if await _acquire_daily_lock("reconcile_user_aggregates", next_run):
+            try:
+                fixed = await reconcile_user_aggregates()
+                logger.info("Aggregate reconciliation fixed %d users", fixed)
+            except Exception:
+                logger.exception("Aggregate reconciliation failed")
+
+
+# ----------------------
+# Routes
+# ----------------------
+def _board(metric: str, public: bool) -> Leaderboard:
+    board = leaderboards.get(metric)
+    if board is None or (public and metric not in PUBLIC_METRICS):
+        raise HTTPException(status_code=404, detail="Unknown leaderboard")
+    return board
+
+
+def _top(metric: str, board: Leaderboard, limit: int, offset: int) -> dict:
+    return {
+        "metric": metric,
+        "total": len(board),
+        "items": [
+            {"rank": offset + i + 1, "user_id": uid, "value": value}
+            for i, (uid, value) in enumerate(board.top(limit, offset))
+        ],
+    }
+
+
+def _rank(metric: str, board: Leaderboard, user_id: str) -> dict:
+    rank = board.rank(user_id)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"metric": metric, "user_id": user_id, "rank": rank, "total": len(board)}
+
+
+@router.get("/{metric}")
+async def get_leaderboard(
+    metric: str,
+    limit: int = Query(25, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    return _top(metric, _board(metric, public=True), limit, offset)
+
+
+@router.get("/{metric}/users/{user_id}")
+async def get_user_rank(metric: str, user_id: str):
+    return _rank(metric, _board(metric, public=True), user_id)
+
+
+@admin_router.get("/{metric}")
+async def get_admin_leaderboard(
+    metric: str,
+    limit: int = Query(25, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    admin: dict = Depends(get_current_admin),
+):
+    return _top(metric, _board(metric, public=False), limit, offset)
+
+
+@admin_router.get("/{metric}/users/{user_id}")
+async def get_admin_user_rank(metric: str, user_id: str, admin: dict = Depends(get_current_admin)):
+    return _rank(metric, _board(metric, public=False), user_id)
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+from fastapi import APIRouter, Query, Response
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        # default=str like the json fallback, for ObjectId/Decimal128 values.
+        return orjson.dumps(obj, default=str)
+except ImportError:  # pragma: no cover
+    import json
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, default=str, separators=(",", ":")).encode()
+
+from backend.db import get_db
+from backend.pubsub import pubsub
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/catalog", tags=["catalog"])
+
+PUBLIC_STATUSES = ["approved", "pre-launch", "live", "completed"]
+SORTS = ("trending", "featured", "progress", "newest")
+DEFAULT_VIEWS = SORTS
+
+# Fields a public listing may show. Anything else on a project doc (contact
+# email, owner ids, review notes) stays private unless added here.
+PUBLIC_FIELDS = (
+    "project_name", "name", "token_symbol", "short_symbol", "slug", "description",
+    "project_type", "status", "tags", "team_name",
+    "logo_url", "image_url", "hero_image_url", "card_image_url", "video_url",
+    "website", "website_url", "twitter", "twitter_url", "x_url", "discord", "discord_url",
+    "telegram", "telegram_url", "whitepaper_url", "pitch_deck_url",
+    "token_address_sui", "project_token_address", "raise_object_address", "sui_raise_address",
+    "raise_currency", "soft_cap", "hard_cap", "min_contribution", "max_contribution",
+    "price_per_token", "total_raised", "total_contributors", "progress_percent",
+    "featured", "trending", "starts_at", "ends_at", "created_at", "updated_at",
+)
+
+
+def _ts(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def _num(value) -> float:
+    if not value:
+        return 0.0
+    if hasattr(value, "to_decimal"):  # bson Decimal128
+        value = value.to_decimal()
+    return float(value)
+
+
+def _public_doc(doc: dict, doc_id: str) -> dict:
+    # Project stores its id as `_id`; expose it as `id` like the API models do.
+    out = {"id": doc_id}
+    for k in PUBLIC_FIELDS:
+        if k in doc:
+            v = doc[k]
+            out[k] = v.isoformat() if isinstance(v, datetime) else v
+    return out
+
+
+class CatalogSnapshot:
+    """Immutable, columnar view of the public project catalog.
+
+    Numeric fields live in NumPy arrays so sorting and filtering are
+    vectorized; each project's JSON is encoded once at build time and
+    listings are produced by joining the pre-encoded rows.
+    """
+
+    __slots__ = (
+        "ids", "statuses", "project_types", "rows",
+        "soft_cap", "hard_cap", "price_per_token", "total_raised",
+        "progress", "featured", "trending", "created_at",
+        "_orders", "_views", "built_at",
+    )
+
+    def __init__(self, docs: List[dict]):
+        n = len(docs)
+        self.ids = [str(d.get("id") or d.get("_id")) for d in docs]
+        self.statuses = np.array([d.get("status") or "" for d in docs], dtype=object)
+        self.project_types = np.array([d.get("project_type") or "" for d in docs], dtype=object)
+        self.rows = [_dumps(_public_doc(d, i)) for d, i in zip(docs, self.ids)]
+
+        self.soft_cap = np.fromiter((_num(d.get("soft_cap")) for d in docs), dtype=np.float64, count=n)
+        self.hard_cap = np.fromiter((_num(d.get("hard_cap")) for d in docs), dtype=np.float64, count=n)
+        self.price_per_token = np.fromiter((_num(d.get("price_per_token")) for d in docs), dtype=np.float64, count=n)
+        self.total_raised = np.fromiter((_num(d.get("total_raised")) for d in docs), dtype=np.float64, count=n)
+        self.featured = np.fromiter((bool(d.get("featured")) for d in docs), dtype=bool, count=n)
+        self.trending = np.fromiter((bool(d.get("trending")) for d in docs), dtype=bool, count=n)
+        self.created_at = np.fromiter((_ts(d.get("created_at")) for d in docs), dtype=np.float64, count=n)
+
+        self.progress = np.divide(
+            self.total_raised, self.hard_cap,
+            out=np.zeros(n, dtype=np.float64), where=self.hard_cap > 0,
+        )
+
+        # lexsort: last key is primary, ties broken by newest first
+        newest = np.argsort(-self.created_at, kind="stable")
+        self._orders: Dict[str, np.ndarray] = {
+            "newest": newest,
+            "progress": np.lexsort((-self.created_at, -self.progress)),
+            "featured": np.lexsort((-self.created_at, ~self.featured)),
+            "trending": np.lexsort((-self.created_at, -self.progress, ~self.trending)),
+        }
+        self._views: Dict[str, bytes] = {v: self._encode(self._orders[v]) for v in DEFAULT_VIEWS}
+        self.built_at = datetime.utcnow()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _encode(self, idx: np.ndarray) -> bytes:
+        return b"[" + b",".join(self.rows[i] for i in idx) + b"]"
+
+    def select(
+        self,
+        sort: str = "trending",
+        status: Optional[str] = None,
+        project_type: Optional[str] = None,
+        featured: Optional[bool] = None,
+        trending: Optional[bool] = None,
+        min_progress: Optional[float] = None,
+    ) -> np.ndarray:
+        order = self._orders[sort]
+        mask = np.ones(len(self.ids), dtype=bool)
+        if status:
+            mask &= self.statuses == status
+        if project_type:
+            mask &= self.project_types == project_type
+        if featured is not None:
+            mask &= self.featured == featured
+        if trending is not None:
+            mask &= self.trending == trending
+        if min_progress is not None:
+            mask &= self.progress >= min_progress
+        return order[mask[order]]
+
+    def listing(self, sort: str = "trending", skip: int = 0, limit: Optional[int] = None, **filters) -> bytes:
+        if not any(v is not None for v in filters.values()) and skip == 0 and limit is None:
+            return self._views[sort]
+        idx = self.select(sort, **filters)
+        end = None if limit is None else skip + limit
+        return self._encode(idx[skip:end])
+
+
+_snapshot = CatalogSnapshot([])
+_rebuild_lock = asyncio.Lock()
+
+
+def get_catalog() -> CatalogSnapshot:
+    return _snapshot
+
+
+async def rebuild_catalog() -> CatalogSnapshot:
+    """Reload public projects and swap in a new snapshot.
+
+    Admin changes to a project should go through invalidate_catalog() so
+    every worker rebuilds. Readers keep using the old snapshot until the
+    single reference assignment below.
+    """
+    global _snapshot
+    async with _rebuild_lock:
+        db = get_db()
+        docs = await db.projects.find({"status": {"$in": PUBLIC_STATUSES}}).to_list(None)
+        _snapshot = CatalogSnapshot(docs)
+        logger.info("Catalog rebuilt with %d projects", len(_snapshot))
+        return _snapshot
+
+
+async def invalidate_catalog() -> CatalogSnapshot:
+    """Rebuild locally and tell the other workers to do the same."""
+    snapshot = await rebuild_catalog()
+    pubsub.publish("catalog")
+    return snapshot
+
+
+async def _on_catalog_invalidated(data: dict):
+    await rebuild_catalog()
+
+
+pubsub.subscribe("catalog", _on_catalog_invalidated)
+
+
+@router.get("/projects")
+async def list_catalog_projects(
+    sort: str = Query("trending", pattern="^(trending|featured|progress|newest)$"),
+    status: Optional[str] = None,
+    project_type: Optional[str] = None,
+    featured: Optional[bool] = None,
+    trending: Optional[bool] = None,
+    min_progress: Optional[float] = Query(None, ge=0),
+    skip: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+):
+    body = get_catalog().listing(
+        sort, skip=skip, limit=limit,
+        status=status, project_type=project_type,
+        featured=featured, trending=trending, min_progress=min_progress,
+    )
+    return Response(content=body, media_type="application/json")
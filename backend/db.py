@@ -7,8 +7,41 @@ DB_NAME = os.getenv("DB_NAME", "desci_launchpad")
 if not MONGO_URI:
     raise RuntimeError("MONGO_URI environment variable is required")
 
-client = AsyncIOMotorClient(MONGO_URI)
-db = client[DB_NAME]
+# The client is created on first use in each process, so a preloading
+# master never shares its sockets or pool threads with forked workers.
+_client = None
+_client_pid = None
+
+
+def get_client():
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        _client = AsyncIOMotorClient(MONGO_URI)
+        _client_pid = pid
+    return _client
+
 
 def get_db():
-    return db
+    return get_client()[DB_NAME]
+
+
+def close_client():
+    global _client, _client_pid
+    if _client is not None and _client_pid == os.getpid():
+        _client.close()
+    _client = None
+    _client_pid = None
+
+
+class _LazyDatabase:
+    """Module-level `db` that resolves to this process's client on access."""
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __getitem__(self, name):
+        return get_db()[name]
+
+
+db = _LazyDatabase()
@@ -0,0 +1,172 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import BulkWriteError
+
+from backend.db import get_db
+from backend.models import Event, EventType, OrderHistoryEntry, OrderStatus, OrderUpdate, ProjectUpdate, UserStatus
+
+logger = logging.getLogger(__name__)
+
+EVENT_FLUSH_SIZE = int(os.environ.get("EVENT_FLUSH_SIZE", 200))
+EVENT_FLUSH_INTERVAL = float(os.environ.get("EVENT_FLUSH_INTERVAL", 1.0))
+EVENT_BUFFER_MAX = int(os.environ.get("EVENT_BUFFER_MAX", 50000))
+ORDER_HISTORY_EMBED_LIMIT = int(os.environ.get("ORDER_HISTORY_EMBED_LIMIT", 10))
+
+# Order history reads project only these fields, so the index covers them.
+ORDER_HISTORY_INDEX = [
+    ("type", ASCENDING),
+    ("entity_id", ASCENDING),
+    ("timestamp", DESCENDING),
+    ("status", ASCENDING),
+    ("note", ASCENDING),
+]
+ORDER_HISTORY_PROJECTION = {"_id": 0, "status": 1, "timestamp": 1, "note": 1}
+DUPLICATE_KEY = 11000
+
+
+def _event_doc(event: Event) -> dict:
+    # The event id doubles as _id so a retried insert is a no-op, not a second copy.
+    doc = event.model_dump(mode="json")
+    doc["_id"] = doc["id"]
+    return doc
+
+
+# ----------------------
+# Buffered writer
+# ----------------------
+class EventBuffer:
+    """Collects events in memory and writes them with insert_many.
+
+    emit() never awaits the database; a background task flushes when the
+    buffer reaches EVENT_FLUSH_SIZE or every EVENT_FLUSH_INTERVAL seconds.
+    """
+
+    def __init__(self, flush_size: int = EVENT_FLUSH_SIZE, interval: float = EVENT_FLUSH_INTERVAL,
+                 max_size: int = EVENT_BUFFER_MAX):
+        self.flush_size = flush_size
+        self.interval = interval
+        self.max_size = max_size
+        self._pending: List[dict] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def emit(self, event: Event):
+        if len(self._pending) >= self.max_size:
+            logger.error("Event buffer full, dropping %s event for %s", event.type, event.entity_id)
+            return
+        self._pending.append(_event_doc(event))
+        if len(self._pending) >= self.flush_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            await get_db().events.insert_many(batch, ordered=False)
+        except BulkWriteError as exc:
+            # Everything not listed in writeErrors was stored; duplicates were
+            # stored by an earlier attempt.
+            failed = sorted({e["index"] for e in exc.details.get("writeErrors", []) if e.get("code") != DUPLICATE_KEY})
+            if failed:
+                logger.warning("Event flush: %d of %d failed, requeueing", len(failed), len(batch))
+                self._requeue([batch[i] for i in failed])
+        except Exception as exc:
+            logger.warning("Event flush of %d failed, requeueing: %s", len(batch), exc)
+            self._requeue(batch)
+
+    def _requeue(self, docs: List[dict]):
+        self._pending = (docs + self._pending)[-self.max_size:]
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+event_buffer = EventBuffer()
+
+
+async def ensure_event_indexes():
+    events = get_db().events
+    await events.create_index(ORDER_HISTORY_INDEX, name="order_history_covering")
+    await events.create_index([("type", ASCENDING), ("timestamp", DESCENDING)])
+    await events.create_index([("actor_id", ASCENDING), ("timestamp", DESCENDING)])
+
+
+# ----------------------
+# Recorders
+# ----------------------
+def _changes(update) -> dict:
+    return update.model_dump(mode="json", exclude_none=True)
+
+
+async def record_order_status(order_id: str, status: OrderStatus, note: str = "",
+                              actor_id: Optional[str] = None):
+    """Append an order status event and keep only the newest entries embedded on the order.
+
+    The event is written directly rather than buffered: the embedded
+    history is trimmed, so the event stream must hold the full copy first.
+    """
+    entry = OrderHistoryEntry(status=OrderStatus(status).value, timestamp=datetime.utcnow(), note=note)
+    db = get_db()
+    await db.events.insert_one(_event_doc(Event(
+        type=EventType.order_status, entity_type="order", entity_id=order_id,
+        actor_id=actor_id, status=entry.status, note=entry.note, timestamp=entry.timestamp,
+    )))
+    await db.orders.update_one(
+        {"_id": order_id},
+        {"$push": {"history": {"$each": [entry.model_dump(mode="json")], "$slice": -ORDER_HISTORY_EMBED_LIMIT}}},
+    )
+
+
+def record_order_update(order_id: str, update: OrderUpdate, admin: dict):
+    event_buffer.emit(Event(
+        type=EventType.order_update, entity_type="order", entity_id=order_id,
+        actor_id=admin.get("admin_id"), status=update.status.value if update.status else None,
+        note=update.admin_notes, data=_changes(update),
+    ))
+
+
+def record_project_update(project_id: str, update: ProjectUpdate, admin: dict):
+    event_buffer.emit(Event(
+        type=EventType.project_update, entity_type="project", entity_id=project_id,
+        actor_id=admin.get("admin_id"), status=update.status.value if update.status else None,
+        note=update.admin_notes or update.rejection_reason, data=_changes(update),
+    ))
+
+
+def record_user_status(user_id: str, status: UserStatus, admin: dict, note: Optional[str] = None):
+    event_buffer.emit(Event(
+        type=EventType.user_status, entity_type="user", entity_id=user_id,
+        actor_id=admin.get("admin_id"), status=status.value, note=note,
+    ))
+
+
+def record_admin_event(type: EventType, admin_id: str, data: Optional[dict] = None):
+    event_buffer.emit(Event(
+        type=type, entity_type="admin", entity_id=admin_id, actor_id=admin_id, data=data or {},
+    ))
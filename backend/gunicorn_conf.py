@@ -0,0 +1,68 @@
+"""Production entry point.
+
+    gunicorn -c backend/gunicorn_conf.py backend.server:app
+
+The master imports the app once (preload) and warms Pydantic/OpenAPI
+schemas before forking, so workers share those pages copy-on-write.
+Everything that owns sockets or threads (Motor client, pub/sub socket,
+media process pool, event buffer) is created inside each worker by the
+app lifespan, after fork. Workers are pinned to one core each; the media
+resize pool resets its affinity so it still uses every core.
+"""
+import gc
+import os
+import shutil
+
+from backend.pubsub import PUBSUB_DIR
+
+
+def _available_cpus():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # not Linux
+        return list(range(os.cpu_count() or 1))
+
+
+_cpus = _available_cpus()
+
+bind = os.environ.get("BIND", f"0.0.0.0:{os.environ.get('PORT', '8000')}")
+workers = int(os.environ.get("WEB_CONCURRENCY", len(_cpus)))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+keepalive = int(os.environ.get("KEEPALIVE", 5))
+timeout = int(os.environ.get("WORKER_TIMEOUT", 60))
+graceful_timeout = 30
+pin_workers = os.environ.get("PIN_WORKERS", "1") != "0"
+
+
+def on_starting(server):
+    # Sockets left by a previous run would only cost a refused send each.
+    shutil.rmtree(PUBSUB_DIR, ignore_errors=True)
+
+
+def when_ready(server):
+    # With preload_app the master already holds the loaded application.
+    app = server.app.wsgi()
+    if hasattr(app, "openapi"):
+        app.openapi()
+    # Keep the warmed objects out of the GC's generations so collections in
+    # workers do not touch (and un-share) those pages.
+    gc.collect()
+    gc.freeze()
+
+
+def pre_fork(server, worker):
+    # Runs in the master, which knows every live worker's core. worker.age
+    # only ever grows, so a respawned worker takes the least-used core
+    # (the one its predecessor freed) rather than one derived from its age.
+    load = {cpu: 0 for cpu in _cpus}
+    for w in server.WORKERS.values():
+        if getattr(w, "cpu", None) in load:
+            load[w.cpu] += 1
+    worker.cpu = min(_cpus, key=lambda cpu: (load[cpu], cpu))
+
+
+def post_fork(server, worker):
+    if pin_workers and hasattr(os, "sched_setaffinity") and workers <= len(_cpus):
+        os.sched_setaffinity(0, {worker.cpu})
+        server.log.info("Worker %s pinned to CPU %s", worker.pid, worker.cpu)
@@ -0,0 +1,363 @@
+import os
+import io
+import time
+import errno
+import fcntl
+import socket
+import asyncio
+import hashlib
+import logging
+import ipaddress
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import httpx
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+
+def _default_media_workers() -> int:
+    # Every web worker gets its own pool, so split the cores between them.
+    web_workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    return max(1, (os.cpu_count() or 2) // (2 * web_workers))
+
+
+MEDIA_CACHE_DIR = Path(os.environ.get("MEDIA_CACHE_DIR", "/tmp/desci-media-cache"))
+MEDIA_CACHE_MAX_BYTES = int(os.environ.get("MEDIA_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+MEDIA_MAX_SOURCE_BYTES = int(os.environ.get("MEDIA_MAX_SOURCE_BYTES", 20 * 1024 * 1024))
+MEDIA_WORKERS = int(os.environ.get("MEDIA_WORKERS", _default_media_workers()))
+MEDIA_MAX_REDIRECTS = 3
+# Hosts the proxy may fetch from. Empty means the proxy is disabled: it
+# must never fetch arbitrary URLs on behalf of anonymous clients. The
+# frontend only rewrites image URLs whose host is in its own copy of this
+# list (REACT_APP_MEDIA_ALLOWED_HOSTS) and loads the rest directly.
+MEDIA_ALLOWED_HOSTS = {
+    h.strip().lower() for h in os.environ.get("MEDIA_ALLOWED_HOSTS", "").split(",") if h.strip()
+}
+
+# Fixed widths so arbitrary ?w= values cannot fill the cache.
+WIDTHS = (160, 320, 650, 1300)
+FORMATS = {"webp": "image/webp", "avif": "image/avif"}
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+# ----------------------
+# Disk cache
+# ----------------------
+class DiskCache:
+    """LRU-by-mtime cache directory shared by every worker on the host.
+
+    The directory itself is the index, so all workers see the same
+    entries and one byte budget. Hits bump mtime (at most once a minute),
+    and whichever worker notices the budget is exceeded sweeps the oldest
+    files under an flock. Files used within SWEEP_GRACE are never
+    removed, so a worker cannot lose a file it is about to serve.
+    """
+
+    TOUCH_INTERVAL = 60
+    SWEEP_GRACE = 60
+    SWEEP_INTERVAL = 30
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.src_dir = root / "src"
+        self.variant_dir = root / "v"
+        self.src_dir.mkdir(parents=True, exist_ok=True)
+        self.variant_dir.mkdir(parents=True, exist_ok=True)
+        self._written_since_sweep = 0
+        self._next_sweep = 0.0
+
+    def hit(self, path: Path) -> bool:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return False
+        now = time.time()
+        if now - st.st_mtime > self.TOUCH_INTERVAL:
+            try:
+                os.utime(path, (now, now))
+            except FileNotFoundError:
+                return False
+        return True
+
+    def write(self, path: Path, data: bytes):
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        self._written_since_sweep += len(data)
+        if self._written_since_sweep > self.max_bytes // 20 or time.monotonic() >= self._next_sweep:
+            self.sweep()
+
+    def sweep(self) -> int:
+        self._written_since_sweep = 0
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+        with open(self.root / ".sweep.lock", "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as exc:
+                if exc.errno in (errno.EAGAIN, errno.EACCES):
+                    return 0  # another worker is sweeping
+                raise
+            entries, total = [], 0
+            for d in (self.src_dir, self.variant_dir):
+                for e in os.scandir(d):
+                    if e.is_symlink():
+                        if not os.path.exists(e.path):
+                            os.unlink(e.path)
+                        continue
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+                    total += st.st_size
+            if total <= self.max_bytes:
+                return 0
+            entries.sort()
+            target = int(self.max_bytes * 0.9)
+            cutoff = time.time() - self.SWEEP_GRACE
+            removed = 0
+            for mtime, size, path in entries:
+                if total <= target or mtime > cutoff:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            return removed
+
+
+# ----------------------
+# Resizing (runs in worker processes)
+# ----------------------
+def _render_variant(source_path: str, width: int, fmt: str) -> Tuple[bytes, str]:
+    from PIL import Image
+
+    img = Image.open(source_path)
+    img.load()
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    if img.width > width:
+        height = max(1, round(img.height * width / img.width))
+        img = img.resize((width, height), Image.LANCZOS)
+
+    out = io.BytesIO()
+    try:
+        img.save(out, format=fmt.upper(), quality=80)
+    except (KeyError, OSError):
+        # Pillow without an AVIF encoder: fall back to WebP.
+        fmt = "webp"
+        out = io.BytesIO()
+        img.save(out, format="WEBP", quality=80, method=4)
+    return out.getvalue(), fmt
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_cache: Optional[DiskCache] = None
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+def _unpin_cpu():
+    # Web workers may be pinned to one core (gunicorn_conf.post_fork) and
+    # children inherit that; let resize processes use every core.
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, range(os.cpu_count() or 1))
+        except OSError:
+            pass
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MEDIA_WORKERS, initializer=_unpin_cpu)
+    return _pool
+
+
+def _get_cache() -> DiskCache:
+    global _cache
+    if _cache is None:
+        _cache = DiskCache(MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES)
+    return _cache
+
+
+def shutdown_media_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode()).hexdigest()
+
+
+# ----------------------
+# Source fetching
+# ----------------------
+def _is_public_address(addr: str) -> bool:
+    ip = ipaddress.ip_address(addr)
+    return ip.is_global and not ip.is_multicast
+
+
+def _check_source_host(url: str):
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise HTTPException(status_code=400, detail="Invalid image url")
+    if parsed.hostname.lower() not in MEDIA_ALLOWED_HOSTS:
+        raise HTTPException(status_code=403, detail="Image host not allowed")
+    return parsed
+
+
+async def _check_source_url(url: str) -> str:
+    """Allowlisted http(s) host that resolves only to public addresses.
+
+    Returns the address to connect to, so the fetch cannot be pointed
+    elsewhere by a second DNS answer.
+    """
+    parsed = _check_source_host(url)
+    host = parsed.hostname.lower()
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise HTTPException(status_code=502, detail="Failed to resolve image host")
+    if not infos or not all(_is_public_address(info[4][0]) for info in infos):
+        raise HTTPException(status_code=403, detail="Image host not allowed")
+    return infos[0][4][0]
+
+
+def _pinned_request(url: str, addr: str) -> Tuple[str, dict, dict]:
+    """(url, headers, extensions) that reach `addr` while still naming the original host."""
+    parsed = urlparse(url)
+    host = parsed.hostname
+    ip = f"[{addr}]" if ":" in addr else addr
+    netloc = f"{ip}:{parsed.port}" if parsed.port else ip
+    headers = {"Host": f"{host}:{parsed.port}" if parsed.port else host}
+    # TLS still uses the hostname for SNI and certificate verification.
+    extensions = {"sni_hostname": host} if parsed.scheme == "https" else {}
+    return parsed._replace(netloc=netloc).geturl(), headers, extensions
+
+
+async def _download(url: str) -> bytes:
+    # Redirects are followed by hand so every hop goes through the same checks.
+    async with httpx.AsyncClient(timeout=15, follow_redirects=False) as client:
+        for _ in range(MEDIA_MAX_REDIRECTS + 1):
+            addr = await _check_source_url(url)
+            target, headers, extensions = _pinned_request(url, addr)
+            async with client.stream("GET", target, headers=headers, extensions=extensions) as resp:
+                if resp.is_redirect:
+                    url = urljoin(url, resp.headers["location"])
+                    continue
+                if resp.status_code != 200:
+                    raise HTTPException(status_code=502, detail="Failed to fetch source image")
+                chunks, total = [], 0
+                async for chunk in resp.aiter_bytes():
+                    total += len(chunk)
+                    if total > MEDIA_MAX_SOURCE_BYTES:
+                        raise HTTPException(status_code=413, detail="Source image too large")
+                    chunks.append(chunk)
+                return b"".join(chunks)
+    raise HTTPException(status_code=502, detail="Too many redirects")
+
+
+async def _fetch_source(url: str) -> Path:
+    cache = _get_cache()
+    path = cache.src_dir / _url_key(url)
+    if cache.hit(path):
+        return path
+
+    async def fetch():
+        cache.write(path, await _download(url))
+        return path
+
+    return await _once("src:" + url, fetch)
+
+
+async def _once(key: str, factory):
+    """Coalesce concurrent work for the same key into a single task."""
+    fut = _inflight.get(key)
+    if fut is None:
+        fut = asyncio.ensure_future(factory())
+        _inflight[key] = fut
+        fut.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(fut)
+
+
+# ----------------------
+# Variants
+# ----------------------
+def _lookup_variant(cache: DiskCache, base: str) -> Optional[Tuple[Path, str, str]]:
+    # v/<base> is a symlink to v/<base>.<etag>.<fmt>, so one readlink tells
+    # any worker the etag and format without reading or hashing the image.
+    link = cache.variant_dir / base
+    try:
+        target = os.readlink(link)
+    except OSError:
+        return None
+    path = cache.variant_dir / target
+    if not cache.hit(path):
+        return None
+    _, etag, fmt = target.split(".")
+    return path, etag, FORMATS[fmt]
+
+
+async def get_variant(url: str, width: int, fmt: str) -> Tuple[Path, str, str]:
+    """Return (path, etag, media_type) for a cached resized variant, building it if needed."""
+    cache = _get_cache()
+    base = f"{_url_key(url)}_{width}_{fmt}"
+    hit = _lookup_variant(cache, base)
+    if hit is not None:
+        return hit
+
+    async def build():
+        src = await _fetch_source(url)
+        loop = asyncio.get_running_loop()
+        try:
+            data, out_fmt = await loop.run_in_executor(
+                _get_pool(), _render_variant, str(src), width, fmt
+            )
+        except Exception as exc:
+            logger.warning("Failed to render %s: %s", url, exc)
+            raise HTTPException(status_code=415, detail="Unsupported image")
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        name = f"{base}.{etag}.{out_fmt}"
+        path = cache.variant_dir / name
+        cache.write(path, data)
+        tmp_link = cache.variant_dir / f"{base}.{os.getpid()}.lnk"
+        os.symlink(name, tmp_link)
+        os.replace(tmp_link, cache.variant_dir / base)
+        return path, etag, FORMATS[out_fmt]
+
+    return await _once(base, build)
+
+
+@router.get("/image")
+async def get_image(
+    request: Request,
+    url: str = Query(..., max_length=2048),
+    w: int = Query(650, ge=1),
+    fmt: Optional[str] = Query(None, pattern="^(webp|avif)$"),
+):
+    width = next((x for x in WIDTHS if x >= w), WIDTHS[-1])
+    if fmt is None:
+        accept = request.headers.get("accept", "")
+        fmt = "avif" if "image/avif" in accept else "webp"
+
+    # DNS checks run per fetch hop in _download; hits only need the allowlist.
+    _check_source_host(url)
+    path, etag, media_type = await get_variant(url, width, fmt)
+
+    quoted = f'"{etag}"'
+    headers = {"ETag": quoted, "Cache-Control": CACHE_CONTROL, "Vary": "Accept"}
+    if request.headers.get("if-none-match") == quoted:
+        return Response(status_code=304, headers=headers)
+    # FileResponse streams from disk and uses the ASGI pathsend/zero-copy
+    # extensions when the server advertises them.
+    return FileResponse(path, media_type=media_type, headers=headers)
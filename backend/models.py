@@ -301,6 +301,25 @@ class OrderHistoryEntry(BaseModel):
     timestamp: datetime
     note: str
 
+class EventType(str, Enum):
+    order_status = "order_status"
+    order_update = "order_update"
+    project_update = "project_update"
+    user_status = "user_status"
+    admin_login = "admin_login"
+    admin_created = "admin_created"
+
+class Event(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    type: EventType
+    entity_type: str  # order, project, user, admin
+    entity_id: str
+    actor_id: Optional[str] = None
+    status: Optional[str] = None
+    note: Optional[str] = None
+    data: Dict[str, Any] = {}
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
 class OrderCreate(BaseModel):
     user_id: str
     items: List[OrderItem]
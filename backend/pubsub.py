@@ -0,0 +1,100 @@
+import os
+import json
+import socket
+import asyncio
+import logging
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PUBSUB_DIR = Path(os.environ.get("PUBSUB_DIR", "/tmp/desci-pubsub"))
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class LocalPubSub:
+    """Broadcast between worker processes on one host over Unix datagram sockets.
+
+    Every worker binds <PUBSUB_DIR>/<pid>.sock; publish() sends one datagram
+    to each other socket in the directory. Sockets left behind by dead
+    workers are removed when a send is refused. Delivery is best effort,
+    which is enough for cache invalidation.
+    """
+
+    def __init__(self, directory: Path = PUBSUB_DIR):
+        self.directory = directory
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._sock: Optional[socket.socket] = None
+        self._path: Optional[Path] = None
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def start(self):
+        if self._sock is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._path = self.directory / f"{os.getpid()}.sock"
+        if self._path.exists():
+            self._path.unlink()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(self._path))
+        sock.setblocking(False)
+        self._sock = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._on_readable)
+
+    def stop(self):
+        if self._sock is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        except RuntimeError:
+            pass
+        self._sock.close()
+        self._sock = None
+        if self._path is not None and self._path.exists():
+            self._path.unlink()
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self._sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                message = json.loads(data)
+            except ValueError:
+                continue
+            for handler in self._handlers.get(message.get("channel"), ()):
+                asyncio.ensure_future(self._dispatch(handler, message.get("data") or {}))
+
+    @staticmethod
+    async def _dispatch(handler: Handler, data: dict):
+        try:
+            await handler(data)
+        except Exception:
+            logger.exception("Pub/sub handler failed")
+
+    def publish(self, channel: str, data: Optional[dict] = None) -> int:
+        """Send to every other worker; returns how many sockets accepted it."""
+        payload = json.dumps({"channel": channel, "data": data or {}}).encode()
+        sent = 0
+        if not self.directory.exists():
+            return sent
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as out:
+            out.setblocking(False)
+            for peer in self.directory.glob("*.sock"):
+                if peer == self._path:
+                    continue
+                try:
+                    out.sendto(payload, str(peer))
+                    sent += 1
+                except (ConnectionRefusedError, FileNotFoundError):
+                    peer.unlink(missing_ok=True)
+                except BlockingIOError:
+                    logger.warning("Pub/sub peer %s is backlogged, dropping message", peer.name)
+        return sent
+
+
+pubsub = LocalPubSub()
@@ -0,0 +1,233 @@
+import os
+import time
+import ipaddress
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from fastapi import HTTPException, Request
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") != "0"
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_EVICT_INTERVAL = float(os.environ.get("RATE_LIMIT_EVICT_INTERVAL", 60))
+
+
+# ----------------------
+# Policies
+# ----------------------
+@dataclass(frozen=True)
+class RateLimitPolicy:
+    name: str
+    capacity: int          # burst size
+    refill_per_sec: float  # steady-state rate
+
+    @property
+    def idle_ttl(self) -> float:
+        # Once a bucket has been idle long enough to refill completely it is
+        # indistinguishable from a fresh one and can be dropped.
+        return self.capacity / self.refill_per_sec
+
+
+POLICIES: Dict[str, RateLimitPolicy] = {
+    # bcrypt verify per attempt: 5 burst, then 1 every 12s per IP
+    "admin_login": RateLimitPolicy("admin_login", capacity=5, refill_per_sec=1 / 12),
+    "admin_seed": RateLimitPolicy("admin_seed", capacity=2, refill_per_sec=1 / 60),
+    "admin_api": RateLimitPolicy("admin_api", capacity=60, refill_per_sec=10),
+    "sentiment_vote": RateLimitPolicy("sentiment_vote", capacity=10, refill_per_sec=0.5),
+    "swap_quote": RateLimitPolicy("swap_quote", capacity=20, refill_per_sec=2),
+}
+
+
+# ----------------------
+# Stores
+# ----------------------
+class MemoryBucketStore:
+    """Per-process token buckets. O(1) per check, idle buckets swept periodically."""
+
+    def __init__(self, evict_interval: float = RATE_LIMIT_EVICT_INTERVAL):
+        # key -> (tokens, last_refill_ts, idle_ttl)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._evict_interval = evict_interval
+        self._next_evict = time.monotonic() + evict_interval
+
+    def take(self, key: str, policy: RateLimitPolicy, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        if now >= self._next_evict:
+            self.evict(now)
+
+        tokens, last, _ = self._buckets.get(key, (float(policy.capacity), now, 0.0))
+        tokens = min(policy.capacity, tokens + (now - last) * policy.refill_per_sec)
+
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now, policy.idle_ttl)
+            return True, 0.0
+
+        self._buckets[key] = (tokens, now, policy.idle_ttl)
+        return False, (cost - tokens) / policy.refill_per_sec
+
+    def evict(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        stale = [k for k, (_, last, ttl) in self._buckets.items() if now - last >= ttl]
+        for k in stale:
+            del self._buckets[k]
+        self._next_evict = now + self._evict_interval
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# KEYS[1] = bucket key; ARGV = capacity, refill_per_sec, cost, ttl_ms
+_REDIS_TOKEN_BUCKET = """
+local b = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local cap = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local tokens = tonumber(b[1]) or cap
+local ts = tonumber(b[2]) or now
+tokens = math.min(cap, tokens + (now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ARGV[4])
+return {allowed, tostring(retry)}
+"""
+
+
+class RedisBucketStore:
+    """Shared token buckets for multi-worker deployments (any Redis-compatible server)."""
+
+    def __init__(self, url: str, prefix: str = "rl:"):
+        import redis.asyncio as redis_asyncio
+
+        self._redis = redis_asyncio.from_url(url)
+        self._script = self._redis.register_script(_REDIS_TOKEN_BUCKET)
+        self._prefix = prefix
+
+    async def take(self, key: str, policy: RateLimitPolicy, cost: float = 1.0) -> Tuple[bool, float]:
+        ttl_ms = max(1, int(policy.idle_ttl * 1000))
+        allowed, retry = await self._script(
+            keys=[self._prefix + key],
+            args=[policy.capacity, policy.refill_per_sec, cost, ttl_ms],
+        )
+        return bool(allowed), float(retry)
+
+
+_memory_store = MemoryBucketStore()
+_redis_store: Optional[RedisBucketStore] = None
+
+if RATE_LIMIT_REDIS_URL:
+    try:
+        _redis_store = RedisBucketStore(RATE_LIMIT_REDIS_URL)
+    except ImportError:
+        logger.warning("RATE_LIMIT_REDIS_URL set but redis package missing; using in-memory buckets")
+
+
+async def take_token(key: str, policy: RateLimitPolicy, cost: float = 1.0) -> Tuple[bool, float]:
+    if _redis_store is not None:
+        try:
+            return await _redis_store.take(key, policy, cost)
+        except Exception as exc:
+            # Fail open to the local store rather than taking the route down.
+            logger.warning("Redis rate limit backend unavailable: %s", exc)
+    return _memory_store.take(key, policy, cost)
+
+
+# ----------------------
+# Key functions
+# ----------------------
+def _parse_networks(value: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    return [ipaddress.ip_network(v.strip(), strict=False) for v in value.split(",") if v.strip()]
+
+
+# Reverse proxies whose X-Forwarded-For we trust (IPs or CIDRs). Empty
+# means the header is ignored and the socket peer is the client.
+TRUSTED_PROXIES = _parse_networks(os.environ.get("RATE_LIMIT_TRUSTED_PROXIES", ""))
+
+
+def _is_trusted(host: str) -> bool:
+    try:
+        addr = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(addr in net for net in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted(peer):
+        return peer
+    # Walk the chain right to left: each trusted proxy appended the hop it
+    # saw, so the first untrusted entry is the real client. Anything to the
+    # left of it is client-supplied and ignored.
+    hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+def wallet_and_ip(request: Request) -> List[str]:
+    """Keys for routes that act on a wallet.
+
+    The wallet comes from a client-supplied header or query param, so it
+    only adds a per-wallet bucket on top of the per-IP one; rotating it
+    cannot buy a fresh budget.
+    """
+    keys = [f"ip:{client_ip(request)}"]
+    wallet = request.headers.get("x-wallet-address") or request.query_params.get("wallet")
+    if wallet:
+        keys.append(f"wallet:{wallet.lower()}")
+    return keys
+
+
+# ----------------------
+# FastAPI dependency
+# ----------------------
+async def enforce(policy_name: str, keys: Union[str, List[str]]):
+    """Take one token from each key's bucket; 429 on the first that is empty."""
+    if not RATE_LIMIT_ENABLED:
+        return
+    policy = POLICIES[policy_name]
+    for key in [keys] if isinstance(keys, str) else keys:
+        allowed, retry_after = await take_token(f"{policy.name}:{key}", policy)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(max(1, int(retry_after + 0.999)))},
+            )
+
+
+def rate_limit(policy_name: str, key_func: Callable[[Request], Union[str, List[str]]] = client_ip):
+    """Dependency that rejects with 429 before the route body (DB, bcrypt) runs.
+
+    Routes behind an admin token are limited per admin_id by
+    get_current_admin() instead, since the id is only known once the
+    token has been verified.
+    """
+    if policy_name not in POLICIES:
+        raise KeyError(f"Unknown rate limit policy {policy_name!r}")
+
+    async def _check(request: Request):
+        await enforce(policy_name, key_func(request))
+
+    return _check
+
+
+async def evict_loop(interval: float = RATE_LIMIT_EVICT_INTERVAL):
+    """Sweep idle in-memory buckets even when no requests arrive to trigger it."""
+    while True:
+        await asyncio.sleep(interval)
+        _memory_store.evict()
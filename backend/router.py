@@ -7,6 +7,9 @@ import os
 from typing import Optional
 from backend.models import AdminLogin, AdminLoginResponse, AdminUser, AdminUserResponse, AdminUserCreate
 from backend.db import get_db
+from backend.ratelimit import enforce, rate_limit
+from backend.events import record_admin_event
+from backend.models import EventType
 
 router = APIRouter(prefix="/admin", tags=["admin-auth"])
 
@@ -39,16 +42,18 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
         admin_id = payload.get("admin_id")
         if admin_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
-        return payload
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    # Keyed on the verified admin_id, so every admin-authenticated route shares one budget per admin.
+    await enforce("admin_api", f"admin:{admin_id}")
+    return payload
 
 async def require_super_admin(admin: dict = Depends(get_current_admin)):
     if admin.get("role") != "super_admin":
         raise HTTPException(status_code=403, detail="Super admin access required")
     return admin
 
-@router.post("/login", response_model=AdminLoginResponse)
+@router.post("/login", response_model=AdminLoginResponse, dependencies=[Depends(rate_limit("admin_login"))])
 async def admin_login(credentials: AdminLogin):
     db = get_db()
     admin_doc = await db.admin_users.find_one({"email": credentials.email}, {"_id": 0})
@@ -62,11 +67,12 @@ async def admin_login(credentials: AdminLogin):
         raise HTTPException(status_code=401, detail="Account is inactive")
     
     token = create_admin_token(admin_doc["id"], admin_doc["email"], admin_doc["role"])
+    record_admin_event(EventType.admin_login, admin_doc["id"])
     admin_response = AdminUserResponse(**admin_doc)
     
     return AdminLoginResponse(token=token, admin=admin_response)
 
-@router.post("/seed-super-admin")
+@router.post("/seed-super-admin", dependencies=[Depends(rate_limit("admin_seed"))])
 async def seed_super_admin():
     """Create initial super admin if none exists"""
     db = get_db()
@@ -86,6 +92,7 @@ async def seed_super_admin():
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await db.admin_users.insert_one(doc)
+    record_admin_event(EventType.admin_created, admin.id, {"role": admin.role})
     return {"message": "Super admin created", "email": "admin@descilaunch.xyz", "password": "changeme123"}
 
 @router.get("/me", response_model=AdminUserResponse)
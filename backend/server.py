@@ -1,4 +1,5 @@
 import os
+import asyncio
 import logging
 import uuid
 from backend.db import db
@@ -19,6 +20,10 @@ from passlib.context import CryptContext
 from backend.auth.router import router as auth_router
 from backend.launchpad.router import router as launchpad_router
 from backend.slideshow.router import router as slideshow_router
+from backend.catalog import router as catalog_router, rebuild_catalog
+from backend.aggregates import router as leaderboard_router, admin_router as admin_leaderboard_router, ensure_aggregate_indexes, load_leaderboards, reconcile_loop
+from backend.staking import router as staking_router, admin_router as admin_staking_router, ensure_staking_indexes
+from backend.media import router as media_router, shutdown_media_pool
 
 # Admin Routers
 from backend.router import router as admin_auth_router
@@ -33,6 +38,11 @@ from backend.admin.site_config_router import router as admin_site_config_router
 from backend.admin.products_router import router as admin_products_router
 from backend.admin.categories_router import router as admin_categories_router
 from backend.admin.dashboard_router import router as admin_dashboard_router
+from backend.admin.events_router import router as admin_events_router
+from backend.events import event_buffer, ensure_event_indexes
+from backend.pubsub import pubsub
+from backend.ratelimit import evict_loop
+from backend.db import close_client
 
 
 # ----------------------
@@ -54,7 +64,28 @@ if not MONGO_URI:
 # ----------------------
 # 3. App Initialization
 # ----------------------
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker, after fork.
+    pubsub.start()
+    await ensure_event_indexes()
+    event_buffer.start()
+    await rebuild_catalog()
+    await ensure_aggregate_indexes()
+    await load_leaderboards()
+    await ensure_staking_indexes()
+    reconcile_task = asyncio.create_task(reconcile_loop())
+    evict_task = asyncio.create_task(evict_loop())
+    yield
+    reconcile_task.cancel()
+    evict_task.cancel()
+    await event_buffer.stop()
+    pubsub.stop()
+    shutdown_media_pool()
+    close_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -76,6 +107,10 @@ app.add_middleware(
 app.include_router(auth_router, prefix="/api")
 app.include_router(launchpad_router, prefix="/api")
 app.include_router(slideshow_router, prefix="/api")
+app.include_router(catalog_router, prefix="/api")
+app.include_router(media_router, prefix="/api")
+app.include_router(leaderboard_router, prefix="/api")
+app.include_router(staking_router, prefix="/api")
 
 # Admin API
 app.include_router(admin_auth_router, prefix="/api")
@@ -90,6 +125,9 @@ app.include_router(admin_admin_users_router, prefix="/api")
 app.include_router(admin_slides_router, prefix="/api")
 app.include_router(admin_categories_router, prefix="/api")
 app.include_router(admin_dashboard_router, prefix="/api")
+app.include_router(admin_events_router, prefix="/api")
+app.include_router(admin_staking_router, prefix="/api")
+app.include_router(admin_leaderboard_router, prefix="/api")
 
 # ----------------------
 # 5. Health / Root (Render + HEAD fix)
@@ -103,9 +141,7 @@ def root():
 # ----------------------
 # 6. MongoDB Client Connection
 # ----------------------
-
-from backend.db import get_db
-db = get_db()
+# `db` resolves lazily: each worker opens its own Motor client on first use.
 
 
 # ----------------------
@@ -0,0 +1,487 @@
+import os
+import time
+import asyncio
+import uuid
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException
+from pymongo import ReturnDocument, UpdateOne
+
+from backend.aggregates import apply_claim, apply_stake_delta, publish_user
+from backend.db import get_client, get_db
+from backend.router import get_current_admin, require_super_admin
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/staking", tags=["staking"])
+admin_router = APIRouter(prefix="/admin/staking", tags=["admin-staking"])
+
+# Reward units emitted per second per pool when the pool doc does not set its own rate.
+STAKING_REWARD_RATE = float(os.environ.get("STAKING_REWARD_RATE", 0))
+STAKING_BATCH_SIZE = int(os.environ.get("STAKING_BATCH_SIZE", 100000))
+# Stakes/unstakes for one pool arriving within this window share a transaction.
+STAKING_BATCH_WINDOW = float(os.environ.get("STAKING_BATCH_WINDOW", 0.005))
+STAKING_BATCH_MAX_OPS = int(os.environ.get("STAKING_BATCH_MAX_OPS", 256))
+
+
+# ----------------------
+# Reward math
+# ----------------------
+# Each pool keeps acc = cumulative reward per staked unit since creation.
+# A position stores reward_debt = amount * acc at its last settlement and
+# `pending` = rewards settled but not yet claimed, so at any time
+#
+#     accrued = pending + amount * acc - reward_debt
+#
+# which is O(1) per position; only stake/unstake/claim touch the pool.
+
+def advance_index(acc: float, total_staked: float, rate: float, last_update: float, now: float) -> float:
+    if total_staked <= 0 or now <= last_update:
+        return acc
+    return acc + rate * (now - last_update) / total_staked
+
+
+def accrued(position: dict, acc: float) -> float:
+    return position.get("pending", 0) + position["amount"] * acc - position.get("reward_debt", 0)
+
+
+def accrued_batch(amounts: np.ndarray, reward_debts: np.ndarray, pending: np.ndarray,
+                  acc: Union[float, np.ndarray]) -> np.ndarray:
+    """Vectorized accrued() for audits and migrations."""
+    return pending + amounts * acc - reward_debts
+
+
+def settle_position(position: dict, acc: float, new_amount: float) -> dict:
+    """Fields to write when a position's amount changes: bank what it accrued, re-base the debt."""
+    return {"pending": accrued(position, acc), "amount": new_amount, "reward_debt": new_amount * acc}
+
+
+def claim_position(position: dict, acc: float) -> Tuple[float, dict]:
+    """(reward, fields to write) for paying out everything a position has accrued."""
+    return accrued(position, acc), {"pending": 0.0, "reward_debt": position["amount"] * acc}
+
+
+@dataclass
+class StakeOp:
+    user_id: str
+    amount: float                      # > 0 stake, < 0 unstake
+    position_id: Optional[str] = None  # required for unstake
+
+
+# ----------------------
+# Pool state
+# ----------------------
+async def _load_pool(coin_id: str, session=None) -> dict:
+    pool = await get_db().staking_pools.find_one({"_id": coin_id}, session=session)
+    if pool is None:
+        pool = {"_id": coin_id, "acc_reward_per_share": 0.0, "total_staked": 0.0,
+                "reward_rate": STAKING_REWARD_RATE, "last_update": time.time(), "total_emitted": 0.0}
+    return pool
+
+
+def _current_acc(pool: dict, now: float) -> float:
+    if pool.get("migrating"):
+        # Frozen while checkpoint_pool() runs; the window accrues nothing.
+        return pool["acc_reward_per_share"]
+    return advance_index(pool["acc_reward_per_share"], pool["total_staked"],
+                         pool.get("reward_rate", STAKING_REWARD_RATE), pool["last_update"], now)
+
+
+def _position_acc(pool: dict, position: dict, now: float) -> float:
+    # A position the running checkpoint already settled holds everything in
+    # `pending` with no debt, i.e. it is on the post-checkpoint index of 0.
+    if pool.get("migrating") and position.get("checkpoint_id") == pool.get("migration_id"):
+        return 0.0
+    return _current_acc(pool, now)
+
+
+def _check_not_migrating(pool: dict):
+    if pool.get("migrating"):
+        raise HTTPException(status_code=409, detail="Staking pool is being migrated, retry shortly")
+
+
+async def _save_pool(pool: dict, acc: float, total_staked: float, now: float, session):
+    emitted = 0.0 if pool["total_staked"] <= 0 else pool.get("reward_rate", STAKING_REWARD_RATE) * max(0.0, now - pool["last_update"])
+    await get_db().staking_pools.update_one(
+        {"_id": pool["_id"]},
+        {"$set": {"acc_reward_per_share": acc, "total_staked": total_staked, "last_update": now,
+                  "reward_rate": pool.get("reward_rate", STAKING_REWARD_RATE)},
+         "$inc": {"total_emitted": emitted}},
+        upsert=True, session=session,
+    )
+
+
+async def ensure_staking_indexes():
+    await get_db().staking_positions.create_index([("coin_id", 1), ("_id", 1)])
+
+
+# ----------------------
+# Stake / unstake / claim
+# ----------------------
+async def apply_stake_ops(coin_id: str, ops: List[StakeOp]) -> List[Union[dict, HTTPException]]:
+    """Apply a batch of stakes and unstakes against one pool.
+
+    The pool index is advanced once for the whole batch and position
+    writes go out as one bulk_write, inside a single transaction. An
+    invalid op yields an HTTPException in its result slot instead of
+    failing the other ops in the batch.
+    """
+    db = get_db()
+    user_docs: List[dict] = []
+
+    async def txn(session):
+        user_docs.clear()  # with_transaction may retry this callback
+        now = time.time()
+        pool = await _load_pool(coin_id, session)
+        _check_not_migrating(pool)
+        acc = _current_acc(pool, now)
+        total = pool["total_staked"]
+
+        ids = [op.position_id for op in ops if op.position_id]
+        existing: Dict[str, dict] = {
+            p["_id"]: p async for p in db.staking_positions.find(
+                {"_id": {"$in": ids}, "coin_id": coin_id, "status": "active"}, session=session)
+        }
+
+        writes, results, deltas = [], [], {}
+        for op in ops:
+            if op.amount > 0 and op.position_id is None:
+                position = {"_id": str(uuid.uuid4()), "user_id": op.user_id, "coin_id": coin_id,
+                            "amount": op.amount, "reward_debt": op.amount * acc, "pending": 0.0,
+                            "claimed": 0.0, "status": "active", "created_at": now, "updated_at": now}
+                writes.append(UpdateOne({"_id": position["_id"]}, {"$set": position}, upsert=True))
+            else:
+                position = existing.get(op.position_id)
+                if position is None or position["user_id"] != op.user_id:
+                    results.append(HTTPException(status_code=404, detail="Position not found"))
+                    continue
+                amount = position["amount"] + op.amount
+                if amount < 0:
+                    results.append(HTTPException(status_code=400, detail="Unstake amount exceeds position"))
+                    continue
+                position.update(settle_position(position, acc, amount))
+                position.update(status="active" if amount > 0 else "closed", updated_at=now)
+                writes.append(UpdateOne({"_id": position["_id"]}, {"$set": {
+                    k: position[k] for k in ("pending", "amount", "reward_debt", "status", "updated_at")
+                }}))
+            total += op.amount
+            deltas[op.user_id] = deltas.get(op.user_id, 0) + op.amount
+            results.append(position)
+
+        if writes:
+            await db.staking_positions.bulk_write(writes, ordered=True, session=session)
+        await _save_pool(pool, acc, total, now, session)
+        for user_id, delta in deltas.items():
+            if delta:
+                user_docs.append(await apply_stake_delta(user_id, delta, session=session))
+        return results
+
+    async with await get_client().start_session() as session:
+        # with_transaction retries on write conflicts with other workers on the pool doc.
+        results = await session.with_transaction(txn)
+    for doc in user_docs:
+        publish_user(doc)
+    return results
+
+
+class StakeBatcher:
+    """Coalesces concurrent stake/unstake calls per pool into apply_stake_ops() batches.
+
+    The first op for a pool opens a STAKING_BATCH_WINDOW timer; everything
+    queued for that pool until it fires (or until STAKING_BATCH_MAX_OPS)
+    goes through one transaction on the pool doc.
+    """
+
+    def __init__(self, window: float = STAKING_BATCH_WINDOW, max_ops: int = STAKING_BATCH_MAX_OPS):
+        self.window = window
+        self.max_ops = max_ops
+        self._queues: Dict[str, List[Tuple[StakeOp, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # The loop keeps only weak references to tasks; hold flushes here so
+        # none is collected before it resolves its submitters' futures.
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, coin_id: str, op: StakeOp) -> dict:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        queue = self._queues.setdefault(coin_id, [])
+        queue.append((op, fut))
+        if len(queue) >= self.max_ops:
+            self._flush_now(coin_id)
+        elif len(queue) == 1:
+            self._timers[coin_id] = loop.call_later(self.window, self._flush_now, coin_id)
+        return await fut
+
+    def _flush_now(self, coin_id: str):
+        timer = self._timers.pop(coin_id, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._queues.pop(coin_id, None)
+        if batch:
+            task = asyncio.ensure_future(self._flush(coin_id, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, coin_id: str, batch: List[Tuple[StakeOp, asyncio.Future]]):
+        try:
+            results = await apply_stake_ops(coin_id, [op for op, _ in batch])
+        except Exception as exc:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for (_, fut), result in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+
+stake_batcher = StakeBatcher()
+
+
+async def stake(user_id: str, coin_id: str, amount: float) -> dict:
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
+    return await stake_batcher.submit(coin_id, StakeOp(user_id, amount))
+
+
+async def unstake(user_id: str, position_id: str, amount: float) -> dict:
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
+    position = await get_db().staking_positions.find_one({"_id": position_id}, {"coin_id": 1})
+    if position is None:
+        raise HTTPException(status_code=404, detail="Position not found")
+    return await stake_batcher.submit(position["coin_id"], StakeOp(user_id, -amount, position_id))
+
+
+async def claim(user_id: str, position_id: str) -> float:
+    """Pay out everything accrued on a position; the pool index itself is not written."""
+    db = get_db()
+    now = time.time()
+    async with await get_client().start_session() as session:
+        async with session.start_transaction():
+            position = await db.staking_positions.find_one(
+                {"_id": position_id, "user_id": user_id}, session=session)
+            if position is None:
+                raise HTTPException(status_code=404, detail="Position not found")
+            pool = await _load_pool(position["coin_id"], session)
+            _check_not_migrating(pool)
+            acc = _current_acc(pool, now)
+            reward, fields = claim_position(position, acc)
+            if reward <= 0:
+                return 0.0
+            claimed_before = position.get("claimed", 0)
+            updated = await db.staking_positions.find_one_and_update(
+                # Guard on the debt we read so a concurrent claim cannot pay twice.
+                {"_id": position_id, "reward_debt": position.get("reward_debt", 0),
+                 "pending": position.get("pending", 0)},
+                {"$set": {**fields, "updated_at": now},
+                 "$inc": {"claimed": reward}},
+                return_document=ReturnDocument.AFTER, session=session,
+            )
+            if updated is None:
+                raise HTTPException(status_code=409, detail="Position changed, retry claim")
+            user = await apply_claim(user_id, claimed_before, updated["claimed"], session=session)
+    publish_user(user)
+    return reward
+
+
+async def position_view(position_id: str) -> dict:
+    position = await get_db().staking_positions.find_one({"_id": position_id})
+    if position is None:
+        raise HTTPException(status_code=404, detail="Position not found")
+    pool = await _load_pool(position["coin_id"])
+    position["accrued"] = accrued(position, _position_acc(pool, position, time.time()))
+    position["id"] = position.pop("_id")
+    return position
+
+
+# ----------------------
+# Batch audit / migration
+# ----------------------
+async def _iter_position_batches(coin_id: str, batch_size: int = STAKING_BATCH_SIZE,
+                                 extra_filter: Optional[dict] = None, migration_id: Optional[str] = None):
+    """Yield (ids, rows) with columns amount, reward_debt, pending, claimed, settled.
+
+    `settled` is 1.0 for positions already checkpointed by `migration_id`.
+    """
+    cursor = get_db().staking_positions.find(
+        {"coin_id": coin_id, **(extra_filter or {})},
+        {"_id": 1, "amount": 1, "reward_debt": 1, "pending": 1, "claimed": 1, "checkpoint_id": 1},
+    ).batch_size(batch_size)
+    ids, rows = [], []
+    async for p in cursor:
+        ids.append(p["_id"])
+        settled = migration_id is not None and p.get("checkpoint_id") == migration_id
+        rows.append((p.get("amount", 0), p.get("reward_debt", 0), p.get("pending", 0), p.get("claimed", 0),
+                     float(settled)))
+        if len(rows) >= batch_size:
+            yield ids, np.array(rows, dtype=np.float64)
+            ids, rows = [], []
+    if rows:
+        yield ids, np.array(rows, dtype=np.float64)
+
+
+async def audit_pool(coin_id: str) -> dict:
+    """Check outstanding + claimed rewards against what the pool has emitted."""
+    pool = await _load_pool(coin_id)
+    now = time.time()
+    acc = _current_acc(pool, now)
+    emitted = pool.get("total_emitted", 0.0)
+    if pool["total_staked"] > 0 and not pool.get("migrating"):
+        emitted += pool.get("reward_rate", STAKING_REWARD_RATE) * max(0.0, now - pool["last_update"])
+
+    migration_id = pool.get("migration_id") if pool.get("migrating") else None
+    count, staked, outstanding, claimed, negative = 0, 0.0, 0.0, 0.0, 0
+    async for _, arr in _iter_position_batches(coin_id, migration_id=migration_id):
+        # Positions settled by a running checkpoint are valued at index 0.
+        owed = accrued_batch(arr[:, 0], arr[:, 1], arr[:, 2], np.where(arr[:, 4] > 0, 0.0, acc))
+        count += len(arr)
+        staked += float(arr[:, 0].sum())
+        outstanding += float(owed.sum())
+        claimed += float(arr[:, 3].sum())
+        negative += int((owed < -1e-9).sum())
+
+    return {
+        "coin_id": coin_id,
+        "positions": count,
+        "total_staked": staked,
+        "pool_total_staked": pool["total_staked"],
+        "outstanding": outstanding,
+        "claimed": claimed,
+        "emitted": emitted,
+        "surplus": emitted - outstanding - claimed,
+        "negative_positions": negative,
+    }
+
+
+async def checkpoint_pool(coin_id: str) -> int:
+    """Settle every position into `pending` and reset the pool index to zero.
+
+    Used for migrations (e.g. changing reward_rate semantics) and to keep
+    acc small enough that float products stay precise. Positions are
+    recomputed in NumPy batches.
+
+    The migrating flag is taken with a conditional update before anything
+    is read. Stakes and unstakes write the pool doc in their transaction,
+    so they either committed before the flag or conflict, retry and get a
+    409; claims get a 409 from the flag or from their position guard. The
+    index is frozen at `migration_acc` until the pool is unlocked. If
+    settling fails partway, rollback_checkpoint() re-bases the positions
+    already settled and unlocks the pool.
+    """
+    db = get_db()
+    migration_id = str(uuid.uuid4())
+    pool = await db.staking_pools.find_one_and_update(
+        {"_id": coin_id, "migrating": {"$ne": True}},
+        {"$set": {"migrating": True, "migration_id": migration_id}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if pool is None:
+        if await db.staking_pools.count_documents({"_id": coin_id}, limit=1):
+            raise HTTPException(status_code=409, detail="Staking pool is already being migrated")
+        raise HTTPException(status_code=404, detail="Staking pool not found")
+
+    # `pool` is the pre-flag doc, so this advances acc and books the
+    # emission up to now at the real rate.
+    now = time.time()
+    acc = _current_acc(pool, now)
+    await _save_pool(pool, acc, pool["total_staked"], now, None)
+    await db.staking_pools.update_one({"_id": coin_id}, {"$set": {"migration_acc": acc}})
+
+    try:
+        updated = await _settle_positions(coin_id, acc, migration_id)
+    except Exception:
+        logger.exception("Checkpoint of pool %s failed, rolling back", coin_id)
+        await rollback_checkpoint(coin_id)
+        raise
+
+    await db.staking_pools.update_one(
+        {"_id": coin_id, "migration_id": migration_id},
+        {"$set": {"acc_reward_per_share": 0.0, "last_update": time.time(), "migrating": False},
+         "$unset": {"migration_id": "", "migration_acc": ""}},
+    )
+    logger.info("Checkpointed %d positions in pool %s", updated, coin_id)
+    return updated
+
+
+async def _settle_positions(coin_id: str, acc: float, migration_id: str, max_passes: int = 5) -> int:
+    db = get_db()
+    updated = 0
+    for _ in range(max_passes):
+        seen = 0
+        async for ids, arr in _iter_position_batches(coin_id, extra_filter={"checkpoint_id": {"$ne": migration_id}}):
+            seen += len(ids)
+            settled = accrued_batch(arr[:, 0], arr[:, 1], arr[:, 2], acc)
+            # Conditional on the values read: a claim that committed after
+            # the read makes this a no-op and the next pass picks it up.
+            ops = [
+                UpdateOne(
+                    {"_id": pid, "amount": float(a), "reward_debt": float(d), "pending": float(p)},
+                    {"$set": {"pending": float(v), "reward_debt": 0.0, "checkpoint_id": migration_id}},
+                )
+                for pid, a, d, p, v in zip(ids, arr[:, 0].tolist(), arr[:, 1].tolist(), arr[:, 2].tolist(),
+                                           settled.tolist())
+            ]
+            result = await db.staking_positions.bulk_write(ops, ordered=False)
+            updated += result.modified_count
+        if seen == 0:
+            return updated
+    raise RuntimeError(f"positions in pool {coin_id} kept changing during checkpoint")
+
+
+async def rollback_checkpoint(coin_id: str):
+    """Undo a partial checkpoint_pool() and unlock the pool.
+
+    Settled positions have pending = accrued at migration_acc and a zero
+    debt; re-basing their debt to amount * migration_acc makes them
+    consistent with the pool index staying at migration_acc, so nothing
+    is paid twice.
+    """
+    db = get_db()
+    pool = await db.staking_pools.find_one({"_id": coin_id})
+    if not pool or not pool.get("migrating"):
+        return
+    acc = pool.get("migration_acc", pool["acc_reward_per_share"])
+    if pool.get("migration_id"):
+        await db.staking_positions.update_many(
+            {"coin_id": coin_id, "checkpoint_id": pool["migration_id"]},
+            [{"$set": {"reward_debt": {"$multiply": ["$amount", acc]}}}],
+        )
+    await db.staking_pools.update_one(
+        {"_id": coin_id},
+        {"$set": {"acc_reward_per_share": acc, "last_update": time.time(), "migrating": False},
+         "$unset": {"migration_id": "", "migration_acc": ""}},
+    )
+    logger.warning("Rolled back checkpoint of pool %s", coin_id)
+
+
+# ----------------------
+# Routes
+# ----------------------
+@router.get("/positions/{position_id}")
+async def get_position(position_id: str):
+    return await position_view(position_id)
+
+
+@admin_router.get("/pools/{coin_id}/audit")
+async def get_pool_audit(coin_id: str, admin: dict = Depends(get_current_admin)):
+    return await audit_pool(coin_id)
+
+
+@admin_router.post("/pools/{coin_id}/checkpoint")
+async def post_pool_checkpoint(coin_id: str, admin: dict = Depends(require_super_admin)):
+    return {"coin_id": coin_id, "positions": await checkpoint_pool(coin_id)}
+
+
+@admin_router.post("/pools/{coin_id}/checkpoint/rollback")
+async def post_pool_checkpoint_rollback(coin_id: str, admin: dict = Depends(require_super_admin)):
+    """Recovery for a checkpoint whose own rollback failed (pool left migrating)."""
+    await rollback_checkpoint(coin_id)
+    return {"coin_id": coin_id, "migrating": False}
@@ -0,0 +1,86 @@
+"""Throughput vs. worker count for the production entry point.
+
+    MONGO_URI=... python bench/bench_workers.py --workers 1 2 4 8 --duration 10
+
+Starts gunicorn with backend/gunicorn_conf.py for each worker count and
+drives the given path with concurrent keep-alive clients. Use
+--app bench.catalog_app:app to measure without a database; results are
+recorded in bench/README.md.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def _client(url: str, deadline: float, counts: list):
+    async with httpx.AsyncClient(timeout=10) as client:
+        while time.monotonic() < deadline:
+            resp = await client.get(url)
+            counts[0 if resp.status_code == 200 else 1] += 1
+
+
+async def drive(url: str, concurrency: int, duration: float):
+    counts = [0, 0]
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(_client(url, deadline, counts) for _ in range(concurrency)))
+    return counts
+
+
+async def wait_ready(base: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=2) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(base + "/")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.25)
+    raise RuntimeError("server did not become ready")
+
+
+def run(workers: int, args) -> tuple:
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{args.port}")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn_conf.py", args.app],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base))
+        asyncio.run(drive(base + args.path, args.concurrency, 1.0))  # warm-up
+        ok, errors = asyncio.run(drive(base + args.path, args.concurrency, args.duration))
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    return ok / args.duration, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--app", default="backend.server:app")
+    parser.add_argument("--path", default="/api/catalog/projects")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    baseline = None
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8} {'errors':>7}")
+    for n in sorted(set(args.workers)):
+        rps, errors = run(n, args)
+        baseline = baseline or rps
+        print(f"{n:>8} {rps:>10.0f} {rps / baseline:>7.2f}x {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
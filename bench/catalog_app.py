@@ -0,0 +1,53 @@
+"""Catalog-only app for bench_workers.py; serves a synthetic snapshot, no MongoDB needed.
+
+    python bench/bench_workers.py --app bench.catalog_app:app
+"""
+import os
+import random
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+
+from fastapi import FastAPI
+
+from backend import catalog
+
+BENCH_PROJECTS = int(os.environ.get("BENCH_PROJECTS", 500))
+
+
+def _synthetic_projects(n: int):
+    rng = random.Random(42)
+    start = datetime(2024, 1, 1)
+    for i in range(n):
+        hard_cap = rng.uniform(1e4, 1e6)
+        yield {
+            "_id": f"p{i}",
+            "name": f"Project {i}",
+            "short_symbol": f"P{i}",
+            "description": "Synthetic project used for load testing. " * 3,
+            "status": rng.choice(catalog.PUBLIC_STATUSES),
+            "project_type": rng.choice(["biotech", "neuro", "longevity"]),
+            "soft_cap": hard_cap / 4,
+            "hard_cap": hard_cap,
+            "price_per_token": rng.uniform(0.01, 2),
+            "total_raised": rng.uniform(0, hard_cap),
+            "featured": rng.random() < 0.1,
+            "trending": rng.random() < 0.2,
+            "created_at": start + timedelta(hours=i),
+        }
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    catalog._snapshot = catalog.CatalogSnapshot(list(_synthetic_projects(BENCH_PROJECTS)))
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
+app.include_router(catalog.router, prefix="/api")
+
+
+@app.get("/")
+def root():
+    return {"status": "ok"}
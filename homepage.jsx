@@ -7,6 +7,33 @@ const Divider = () => <div className="h-px bg-slate-800/50 mx-auto max-w-6xl" />
 
 const backendUrl = process.env.REACT_APP_BACKEND_URL || "https://desci-backend.onrender.com";
 
+// Only hosts the backend proxy allowlists (MEDIA_ALLOWED_HOSTS) go through it;
+// anything else, or a proxy error, loads the original image.
+const mediaHosts = new Set(
+  (process.env.REACT_APP_MEDIA_ALLOWED_HOSTS || "")
+    .split(",")
+    .map((h) => h.trim().toLowerCase())
+    .filter(Boolean)
+);
+
+const mediaUrl = (src, width) => {
+  if (!src) return src;
+  try {
+    if (!mediaHosts.has(new URL(src).hostname.toLowerCase())) return src;
+  } catch {
+    return src;
+  }
+  return `${backendUrl}/api/media/image?url=${encodeURIComponent(src)}&w=${width}`;
+};
+
+const fallbackToSource = (src) => (e) => {
+  const img = e.currentTarget;
+  if (src && !img.dataset.fallback) {
+    img.dataset.fallback = "1";
+    img.src = src;
+  }
+};
+
 export default function HomePage() {
   const [projects, setProjects] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -136,7 +163,7 @@ export default function HomePage() {
                 to={`/launches/${p.id}`} 
                 className="group block rounded-2xl bg-slate-900/60 ring-1 ring-slate-800 hover:ring-cyan-400 transition-all overflow-hidden"
               >
-                <img src={p.image_url} className="h-40 w-full object-cover grayscale-[0.2] group-hover:grayscale-0 transition-all" alt={p.name} />
+                <img src={mediaUrl(p.image_url, 650)} onError={fallbackToSource(p.image_url)} loading="lazy" className="h-40 w-full object-cover grayscale-[0.2] group-hover:grayscale-0 transition-all" alt={p.name} />
                 <div className="p-5">
                   <h3 className="text-sm font-semibold group-hover:text-cyan-400 transition-colors">{p.name}</h3>
                   <div className="mt-3 h-1.5 bg-slate-700 rounded-full overflow-hidden">
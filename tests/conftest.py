@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# backend.db refuses to import without a URI; nothing here talks to Mongo.
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
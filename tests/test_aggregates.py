@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from backend import aggregates
+from backend.aggregates import Leaderboard
+
+
+def test_top_and_rank():
+    board = Leaderboard()
+    board.load({"a": 10, "b": 30, "c": 20})
+    assert board.top(2) == [("b", 30), ("c", 20)]
+    assert board.top(2, offset=2) == [("a", 10)]
+    assert [board.rank(u) for u in "bca"] == [1, 2, 3]
+    assert board.rank("missing") is None
+
+
+def test_update_moves_user_and_keeps_size():
+    board = Leaderboard()
+    board.load({"a": 10, "b": 30, "c": 20})
+    board.update("a", 40)
+    assert board.rank("a") == 1 and board.rank("b") == 2
+    board.update("a", 40)
+    board.update("d", 5)
+    assert len(board) == 4
+    assert board.top(4) == [("a", 40), ("b", 30), ("c", 20), ("d", 5)]
+
+
+def test_ties_share_rank_and_order_by_id():
+    board = Leaderboard()
+    board.load({"b": 10, "a": 10, "c": 5})
+    assert board.top(3) == [("a", 10), ("b", 10), ("c", 5)]
+    assert board.rank("a") == board.rank("b") == 1
+    assert board.rank("c") == 3
+
+
+def test_publish_user_updates_every_metric(monkeypatch):
+    published = []
+    monkeypatch.setattr(aggregates.pubsub, "publish", lambda channel, data=None: published.append((channel, data)))
+    monkeypatch.setattr(aggregates, "leaderboards", {m: Leaderboard() for m in aggregates.METRICS})
+    aggregates.publish_user({"_id": "u1", "total_spent": 5, "total_staked": 7})
+    assert aggregates.leaderboards["total_staked"].top(1) == [("u1", 7.0)]
+    assert aggregates.leaderboards["loyalty_points"].top(1) == [("u1", 0.0)]
+    assert published == [("aggregates", {"_id": "u1", "total_spent": 5, "total_staked": 7, "loyalty_points": 0})]
+
+
+def test_spend_leaderboard_is_not_public(monkeypatch):
+    board = Leaderboard()
+    board.load({"u1": 100})
+    monkeypatch.setattr(aggregates, "leaderboards", {m: board for m in aggregates.METRICS})
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(aggregates.get_leaderboard("total_spent", limit=25, offset=0))
+    assert exc.value.status_code == 404
+    with pytest.raises(HTTPException):
+        asyncio.run(aggregates.get_user_rank("total_spent", "u1"))
+    admin = asyncio.run(aggregates.get_admin_leaderboard("total_spent", limit=25, offset=0, admin={}))
+    assert admin["items"] == [{"rank": 1, "user_id": "u1", "value": 100}]
+    assert asyncio.run(aggregates.get_leaderboard("loyalty_points", limit=25, offset=0))["total"] == 1
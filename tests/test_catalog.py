@@ -0,0 +1,76 @@
+import json
+from datetime import datetime
+
+from bson import Decimal128, ObjectId
+
+from backend.catalog import CatalogSnapshot
+
+
+def _doc(i, **kw):
+    doc = {
+        "_id": f"p{i}", "project_name": f"Project {i}", "status": "live", "project_type": "biotech",
+        "hard_cap": 100, "total_raised": 0, "created_at": datetime(2026, 1, i + 1),
+    }
+    doc.update(kw)
+    return doc
+
+
+def _ids(body: bytes):
+    return [row["id"] for row in json.loads(body)]
+
+
+def test_rows_expose_only_public_fields():
+    snap = CatalogSnapshot([_doc(
+        0, contact_email="a@b.c", owner_user_id="u1", owner_email="o@b.c",
+        admin_notes="x", rejection_reason="y", logo_url="https://img/logo.png",
+    )])
+    (row,) = json.loads(snap.listing())
+    assert row["id"] == "p0"
+    assert row["logo_url"] == "https://img/logo.png"
+    assert row["created_at"] == "2026-01-01T00:00:00"
+    for private in ("_id", "contact_email", "owner_user_id", "owner_email", "admin_notes", "rejection_reason"):
+        assert private not in row
+
+
+def test_bson_values_do_not_break_encoding():
+    snap = CatalogSnapshot([_doc(0, tags=[str(ObjectId())], hard_cap=Decimal128("200"),
+                                 total_raised=Decimal128("50"), team_name=ObjectId())])
+    (row,) = json.loads(snap.listing())
+    assert isinstance(row["team_name"], str)
+    assert snap.progress[0] == 0.25
+
+
+def test_orderings():
+    docs = [
+        _doc(0, total_raised=90),
+        _doc(1, total_raised=10, featured=True),
+        _doc(2, total_raised=50, trending=True),
+        _doc(3, total_raised=50),
+    ]
+    snap = CatalogSnapshot(docs)
+    assert _ids(snap.listing("newest")) == ["p3", "p2", "p1", "p0"]
+    assert _ids(snap.listing("progress")) == ["p0", "p3", "p2", "p1"]
+    assert _ids(snap.listing("featured")) == ["p1", "p3", "p2", "p0"]
+    assert _ids(snap.listing("trending")) == ["p2", "p0", "p3", "p1"]
+
+
+def test_filters_and_paging():
+    docs = [
+        _doc(0, status="completed", total_raised=100),
+        _doc(1, project_type="devices", total_raised=60),
+        _doc(2, total_raised=20, featured=True),
+        _doc(3, total_raised=70),
+    ]
+    snap = CatalogSnapshot(docs)
+    assert _ids(snap.listing("newest", status="live")) == ["p3", "p2", "p1"]
+    assert _ids(snap.listing("newest", project_type="devices")) == ["p1"]
+    assert _ids(snap.listing("newest", featured=False)) == ["p3", "p1", "p0"]
+    assert _ids(snap.listing("progress", min_progress=0.5)) == ["p0", "p3", "p1"]
+    assert _ids(snap.listing("newest", skip=1, limit=2)) == ["p2", "p1"]
+    assert list(snap.select("newest", status="live", min_progress=0.5)) == [3, 1]
+
+
+def test_empty_snapshot():
+    snap = CatalogSnapshot([])
+    assert len(snap) == 0
+    assert snap.listing() == b"[]"
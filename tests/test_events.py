@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from backend import events
+from backend.events import EventBuffer
+from backend.models import Event, EventType, OrderStatus
+
+
+class FakeCollection:
+    """insert_many/insert_one/update_one the way PyMongo behaves for these calls."""
+
+    def __init__(self):
+        self.docs = {}
+        self.fail_ids = set()
+        self.down = False
+        self.updates = []
+
+    async def insert_many(self, docs, ordered=True):
+        if self.down:
+            raise ConnectionError("down")
+        errors = []
+        for i, doc in enumerate(docs):
+            doc.setdefault("_id", ObjectId())  # PyMongo mutates the caller's dicts
+            if doc["_id"] in self.docs:
+                errors.append({"index": i, "code": 11000, "errmsg": "duplicate key"})
+            elif doc["entity_id"] in self.fail_ids:
+                errors.append({"index": i, "code": 121, "errmsg": "validation failed"})
+            else:
+                self.docs[doc["_id"]] = doc
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+
+    async def insert_one(self, doc):
+        await self.insert_many([doc])
+
+    async def update_one(self, flt, update):
+        self.updates.append((flt, update))
+
+
+class FakeDB:
+    def __init__(self):
+        self.events = FakeCollection()
+        self.orders = FakeCollection()
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDB()
+    monkeypatch.setattr(events, "get_db", lambda: db)
+    return db
+
+
+def _event(entity_id):
+    return Event(type=EventType.order_update, entity_type="order", entity_id=entity_id)
+
+
+def test_flush_writes_and_clears(db):
+    buf = EventBuffer(flush_size=10, max_size=100)
+    for i in range(3):
+        buf.emit(_event(f"o{i}"))
+    asyncio.run(buf.flush())
+    assert len(db.events.docs) == 3 and not buf._pending
+    # The event id is the _id, so readers and retries see one identity.
+    assert all(k == d["id"] for k, d in db.events.docs.items())
+
+
+def test_partial_failure_requeues_only_failed(db):
+    buf = EventBuffer(flush_size=10, max_size=100)
+    for i in range(4):
+        buf.emit(_event(f"o{i}"))
+    db.events.fail_ids = {"o2"}
+    asyncio.run(buf.flush())
+    assert len(db.events.docs) == 3
+    assert [d["entity_id"] for d in buf._pending] == ["o2"]
+
+    db.events.fail_ids = set()
+    buf.emit(_event("o4"))
+    asyncio.run(buf.flush())
+    assert len(db.events.docs) == 5 and not buf._pending
+
+
+def test_retry_after_outage_is_idempotent(db):
+    buf = EventBuffer(flush_size=10, max_size=100)
+    for i in range(3):
+        buf.emit(_event(f"o{i}"))
+    # First attempt stores some docs and then the connection drops.
+    db.events.docs[buf._pending[0]["_id"]] = dict(buf._pending[0])
+    db.events.down = True
+    asyncio.run(buf.flush())
+    assert len(buf._pending) == 3
+
+    db.events.down = False
+    asyncio.run(buf.flush())
+    assert len(db.events.docs) == 3 and not buf._pending
+
+
+def test_emit_drops_when_full(db):
+    buf = EventBuffer(flush_size=10, max_size=2)
+    for i in range(3):
+        buf.emit(_event(f"o{i}"))
+    assert [d["entity_id"] for d in buf._pending] == ["o0", "o1"]
+
+
+def test_order_status_is_stored_before_history_is_trimmed(db):
+    asyncio.run(events.record_order_status("o1", OrderStatus.shipped, note="tracking 1"))
+    (doc,) = db.events.docs.values()
+    assert doc["entity_id"] == "o1" and doc["status"] == "shipped"
+    assert not events.event_buffer._pending
+    (flt, update), = db.orders.updates
+    assert update["$push"]["history"]["$slice"] == -events.ORDER_HISTORY_EMBED_LIMIT
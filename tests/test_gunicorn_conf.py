@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+from backend import gunicorn_conf
+
+
+def test_respawned_worker_takes_freed_core(monkeypatch):
+    monkeypatch.setattr(gunicorn_conf, "_cpus", [0, 1, 2, 3])
+    server = SimpleNamespace(WORKERS={})
+    for pid, age in zip(range(100, 104), range(1, 5)):
+        worker = SimpleNamespace(age=age)
+        gunicorn_conf.pre_fork(server, worker)
+        server.WORKERS[pid] = worker
+    assert sorted(w.cpu for w in server.WORKERS.values()) == [0, 1, 2, 3]
+
+    # The worker on core 1 dies; its replacement has age 5.
+    del server.WORKERS[101]
+    replacement = SimpleNamespace(age=5)
+    gunicorn_conf.pre_fork(server, replacement)
+    assert replacement.cpu == 1
+
+
+def test_more_workers_than_cores_spread_evenly(monkeypatch):
+    monkeypatch.setattr(gunicorn_conf, "_cpus", [0, 1])
+    server = SimpleNamespace(WORKERS={})
+    for pid in range(3):
+        worker = SimpleNamespace(age=pid + 1)
+        gunicorn_conf.pre_fork(server, worker)
+        server.WORKERS[pid] = worker
+    assert [w.cpu for w in server.WORKERS.values()] == [0, 1, 0]
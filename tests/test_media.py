@@ -0,0 +1,119 @@
+import asyncio
+import os
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+from backend import media
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = media.DiskCache(tmp_path, 10 * 1024 * 1024)
+    monkeypatch.setattr(media, "_cache", cache)
+    monkeypatch.setattr(media, "MEDIA_ALLOWED_HOSTS", {"images.example.com"})
+    yield cache
+    media.shutdown_media_pool()
+
+
+def _png(path, size=(800, 400)):
+    Image.new("RGB", size, "red").save(path, "PNG")
+
+
+def test_render_variant_resizes_to_webp(tmp_path):
+    src = tmp_path / "src.png"
+    _png(src)
+    data, fmt = media._render_variant(str(src), 320, "webp")
+    assert fmt == "webp"
+    out = tmp_path / "out.webp"
+    out.write_bytes(data)
+    assert Image.open(out).size == (320, 160)
+
+
+def test_get_variant_caches_and_reuses(cache):
+    url = "https://images.example.com/a.png"
+    _png(cache.src_dir / media._url_key(url))
+
+    path, etag, media_type = asyncio.run(media.get_variant(url, 650, "webp"))
+    assert media_type == "image/webp"
+    assert path.exists() and etag in path.name
+    assert Image.open(path).size == (650, 325)
+
+    # Second lookup is served from the symlink index without re-rendering.
+    assert media._lookup_variant(cache, f"{media._url_key(url)}_650_webp") == (path, etag, media_type)
+
+
+@pytest.mark.parametrize("url", [
+    "http://169.254.169.254/latest/meta-data",
+    "http://localhost/a.png",
+    "file:///etc/passwd",
+    "https://other.example.com/a.png",
+])
+def test_check_source_url_rejects_untrusted(cache, url):
+    with pytest.raises(HTTPException):
+        asyncio.run(media._check_source_url(url))
+
+
+def test_check_source_url_rejects_private_resolution(cache, monkeypatch):
+    async def fake_getaddrinfo(host, port, **kwargs):
+        return [(None, None, None, "", ("10.0.0.5", port))]
+
+    loop = asyncio.new_event_loop()
+    monkeypatch.setattr(loop, "getaddrinfo", fake_getaddrinfo)
+    try:
+        with pytest.raises(HTTPException) as exc:
+            loop.run_until_complete(media._check_source_url("https://images.example.com/a.png"))
+        assert exc.value.status_code == 403
+    finally:
+        loop.close()
+
+
+def test_empty_allowlist_rejects_everything(cache, monkeypatch):
+    monkeypatch.setattr(media, "MEDIA_ALLOWED_HOSTS", set())
+    with pytest.raises(HTTPException) as exc:
+        media._check_source_host("https://images.example.com/a.png")
+    assert exc.value.status_code == 403
+
+
+def test_sweep_evicts_oldest_and_keeps_recent(tmp_path):
+    cache = media.DiskCache(tmp_path, 1000)
+    old, new = cache.src_dir / "old", cache.src_dir / "new"
+    old.write_bytes(b"x" * 800)
+    new.write_bytes(b"x" * 800)
+    os.utime(old, (time.time() - 3600, time.time() - 3600))
+    assert cache.sweep() == 1
+    assert not old.exists() and new.exists()
+
+
+def test_download_connects_to_checked_address(cache, monkeypatch):
+    seen = []
+
+    async def fake_check(url):
+        return "93.184.216.34"
+
+    def handler(request):
+        seen.append((str(request.url), request.headers["host"], request.extensions.get("sni_hostname")))
+        if request.url.path == "/a.png":
+            return httpx.Response(302, headers={"location": "/b.png"})
+        return httpx.Response(200, content=b"img")
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(media, "_check_source_url", fake_check)
+    monkeypatch.setattr(media.httpx, "AsyncClient",
+                        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw))
+
+    assert asyncio.run(media._download("https://images.example.com/a.png")) == b"img"
+    assert seen == [
+        ("https://93.184.216.34/a.png", "images.example.com", "images.example.com"),
+        ("https://93.184.216.34/b.png", "images.example.com", "images.example.com"),
+    ]
+
+
+def test_pinned_request_ipv6_and_port():
+    target, headers, extensions = media._pinned_request("http://images.example.com:8080/x?y=1", "2001:db8::1")
+    assert target == "http://[2001:db8::1]:8080/x?y=1"
+    assert headers == {"Host": "images.example.com:8080"}
+    assert extensions == {}
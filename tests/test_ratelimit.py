@@ -0,0 +1,101 @@
+import asyncio
+import ipaddress
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from backend import ratelimit
+from backend.ratelimit import MemoryBucketStore, RateLimitPolicy, client_ip, wallet_and_ip
+
+
+def _request(peer, headers=None, query=b""):
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        "client": (peer, 1234),
+    })
+
+
+@pytest.fixture
+def trusted(monkeypatch):
+    monkeypatch.setattr(ratelimit, "TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/8")])
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = MemoryBucketStore()
+    monkeypatch.setattr(ratelimit, "_memory_store", store)
+    monkeypatch.setattr(ratelimit, "_redis_store", None)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    return store
+
+
+def test_bucket_allows_burst_then_rejects():
+    store = MemoryBucketStore()
+    policy = RateLimitPolicy("t", capacity=3, refill_per_sec=1)
+    assert [store.take("k", policy)[0] for _ in range(3)] == [True, True, True]
+    allowed, retry = store.take("k", policy)
+    assert not allowed and 0 < retry <= 1
+    assert store.take("other", policy)[0]
+
+
+def test_bucket_refills_and_evicts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    store = MemoryBucketStore(evict_interval=3600)
+    policy = RateLimitPolicy("t", capacity=2, refill_per_sec=1)
+    store.take("k", policy)
+    store.take("k", policy)
+    assert not store.take("k", policy)[0]
+    now[0] += 1
+    assert store.take("k", policy)[0]
+    now[0] += policy.idle_ttl
+    assert store.evict() == 1
+    assert len(store) == 0
+
+
+def test_client_ip_ignores_forwarded_for_from_untrusted_peer(trusted):
+    req = _request("203.0.113.9", {"X-Forwarded-For": "1.2.3.4"})
+    assert client_ip(req) == "203.0.113.9"
+
+
+def test_client_ip_walks_past_trusted_hops(trusted):
+    # The client spoofed 1.2.3.4; the first proxy saw 198.51.100.7.
+    req = _request("10.0.0.2", {"X-Forwarded-For": "1.2.3.4, 198.51.100.7, 10.0.0.1"})
+    assert client_ip(req) == "198.51.100.7"
+
+
+def test_client_ip_all_hops_trusted(trusted):
+    req = _request("10.0.0.2", {"X-Forwarded-For": "10.0.0.5"})
+    assert client_ip(req) == "10.0.0.5"
+    assert client_ip(_request("10.0.0.2")) == "10.0.0.2"
+
+
+def test_wallet_keys_always_include_ip():
+    req = _request("203.0.113.9", {"X-Wallet-Address": "0xABC"})
+    assert wallet_and_ip(req) == ["ip:203.0.113.9", "wallet:0xabc"]
+    assert wallet_and_ip(_request("203.0.113.9")) == ["ip:203.0.113.9"]
+
+
+def test_rotating_wallet_does_not_bypass_ip_bucket(store):
+    check = ratelimit.rate_limit("sentiment_vote", wallet_and_ip)
+    capacity = ratelimit.POLICIES["sentiment_vote"].capacity
+
+    async def run():
+        for i in range(capacity):
+            await check(_request("203.0.113.9", {"X-Wallet-Address": f"0x{i}"}))
+        with pytest.raises(HTTPException) as exc:
+            await check(_request("203.0.113.9", {"X-Wallet-Address": "0xfresh"}))
+        assert exc.value.status_code == 429
+        assert int(exc.value.headers["Retry-After"]) >= 1
+
+    asyncio.run(run())
+
+
+def test_rate_limit_rejects_unknown_policy():
+    with pytest.raises(KeyError):
+        ratelimit.rate_limit("nope")
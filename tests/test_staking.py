@@ -0,0 +1,197 @@
+import asyncio
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from backend import staking
+from backend.staking import (
+    StakeOp, accrued, accrued_batch, advance_index, claim_position, settle_position,
+)
+
+
+def _new_position(amount, acc):
+    return {"amount": amount, "reward_debt": amount * acc, "pending": 0.0}
+
+
+def test_advance_index_splits_by_stake():
+    # A stakes 100 at t=0, B stakes 300 at t=10, rate 10/s, checked at t=20.
+    acc = advance_index(0.0, 100, 10, 0, 10)
+    a, b = _new_position(100, 0.0), _new_position(300, acc)
+    acc = advance_index(acc, 400, 10, 10, 20)
+    assert accrued(a, acc) == pytest.approx(125)
+    assert accrued(b, acc) == pytest.approx(75)
+
+
+def test_advance_index_no_stake_or_time():
+    assert advance_index(1.5, 0, 10, 0, 10) == 1.5
+    assert advance_index(1.5, 100, 10, 10, 10) == 1.5
+
+
+def test_accrued_batch_matches_accrued():
+    rng = np.random.default_rng(0)
+    amounts = rng.uniform(0, 1000, 50)
+    debts = rng.uniform(0, 100, 50)
+    pending = rng.uniform(0, 10, 50)
+    acc = 0.37
+    expected = [accrued({"amount": a, "reward_debt": d, "pending": p}, acc)
+                for a, d, p in zip(amounts, debts, pending)]
+    np.testing.assert_allclose(accrued_batch(amounts, debts, pending, acc), expected)
+
+
+def test_conservation_across_stake_unstake_claim():
+    rate, acc, total, t = 10.0, 0.0, 0.0, 0.0
+    positions, claimed = {}, 0.0
+
+    def tick(now):
+        nonlocal acc, t
+        acc = advance_index(acc, total, rate, t, now)
+        t = now
+
+    positions["a"] = _new_position(100, acc)
+    total += 100
+    tick(10)
+    positions["b"] = _new_position(300, acc)
+    total += 300
+    tick(20)
+    positions["a"].update(settle_position(positions["a"], acc, 40))  # unstake 60
+    total -= 60
+    tick(35)
+    reward, fields = claim_position(positions["b"], acc)
+    positions["b"].update(fields)
+    claimed += reward
+    tick(50)
+    positions["b"].update(settle_position(positions["b"], acc, 0))  # full unstake
+    total -= 300
+    tick(60)
+
+    outstanding = sum(accrued(p, acc) for p in positions.values())
+    assert outstanding + claimed == pytest.approx(rate * 60)
+    assert accrued(positions["b"], acc) >= 0
+
+
+def test_claim_position_resets_accrued():
+    position = _new_position(100, 0.0)
+    reward, fields = claim_position(position, 2.0)
+    assert reward == pytest.approx(200)
+    position.update(fields)
+    assert accrued(position, 2.0) == pytest.approx(0)
+
+
+def test_batcher_coalesces_ops_per_pool(monkeypatch):
+    batches = []
+
+    async def fake_apply(coin_id, ops):
+        batches.append((coin_id, len(ops)))
+        return [HTTPException(status_code=400, detail="bad") if op.amount < 0 else {"amount": op.amount}
+                for op in ops]
+
+    monkeypatch.setattr(staking, "apply_stake_ops", fake_apply)
+
+    async def run():
+        batcher = staking.StakeBatcher(window=0.01, max_ops=100)
+        return await asyncio.gather(
+            batcher.submit("c1", StakeOp("u1", 1)),
+            batcher.submit("c1", StakeOp("u2", 2)),
+            batcher.submit("c1", StakeOp("u3", -1, "p")),
+            batcher.submit("c2", StakeOp("u1", 3)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+    assert sorted(batches) == [("c1", 3), ("c2", 1)]
+    assert results[0] == {"amount": 1} and results[1] == {"amount": 2}
+    assert isinstance(results[2], HTTPException) and results[2].status_code == 400
+    assert results[3] == {"amount": 3}
+
+
+def test_batcher_flushes_at_max_ops(monkeypatch):
+    batches = []
+
+    async def fake_apply(coin_id, ops):
+        batches.append(len(ops))
+        return [{} for _ in ops]
+
+    monkeypatch.setattr(staking, "apply_stake_ops", fake_apply)
+
+    async def run():
+        batcher = staking.StakeBatcher(window=10, max_ops=2)
+        await asyncio.wait_for(asyncio.gather(
+            batcher.submit("c1", StakeOp("u1", 1)),
+            batcher.submit("c1", StakeOp("u2", 1)),
+        ), timeout=1)
+
+    asyncio.run(run())
+    assert batches == [2]
+
+
+def test_settled_positions_valued_at_zero_during_checkpoint():
+    pool = {"acc_reward_per_share": 2.0, "total_staked": 100, "reward_rate": 10, "last_update": 0,
+            "migrating": True, "migration_id": "m1"}
+    unsettled = _new_position(100, 1.0)
+    settled = {**unsettled, **settle_position(unsettled, 2.0, 100), "reward_debt": 0.0, "checkpoint_id": "m1"}
+    acc = lambda p: staking._position_acc(pool, p, now=50)
+    assert accrued(unsettled, acc(unsettled)) == pytest.approx(100)
+    assert accrued(settled, acc(settled)) == pytest.approx(100)
+    # Once the pool is unlocked (acc reset to 0) the settled value stands.
+    assert staking._position_acc({**pool, "migrating": False, "acc_reward_per_share": 0.0,
+                                  "last_update": 50}, settled, now=50) == 0.0
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = docs
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        async def gen():
+            for d in self._docs:
+                yield d
+        return gen()
+
+
+def test_audit_balances_mid_checkpoint(monkeypatch):
+    # Rate 10/s, one staker from t=0 to t=10 -> acc 1.0, 100 emitted.
+    pool = {"_id": "c", "acc_reward_per_share": 1.0, "total_staked": 100, "reward_rate": 10,
+            "last_update": 10, "total_emitted": 100, "migrating": True, "migration_id": "m1"}
+    positions = [
+        {"_id": "a", "amount": 60, "reward_debt": 0.0, "pending": 60.0, "claimed": 0, "checkpoint_id": "m1"},
+        {"_id": "b", "amount": 40, "reward_debt": 0.0, "pending": 0.0, "claimed": 0},
+    ]
+
+    async def load_pool(coin_id, session=None):
+        return pool
+
+    class DB:
+        class staking_positions:
+            @staticmethod
+            def find(flt, projection):
+                return _Cursor(positions)
+
+    monkeypatch.setattr(staking, "_load_pool", load_pool)
+    monkeypatch.setattr(staking, "get_db", lambda: DB)
+    report = asyncio.run(staking.audit_pool("c"))
+    assert report["outstanding"] == pytest.approx(100)
+    assert report["surplus"] == pytest.approx(0)
+    assert report["negative_positions"] == 0
+
+
+def test_batcher_holds_flush_tasks(monkeypatch):
+    async def fake_apply(coin_id, ops):
+        await asyncio.sleep(0)
+        return [{} for _ in ops]
+
+    monkeypatch.setattr(staking, "apply_stake_ops", fake_apply)
+
+    async def run():
+        batcher = staking.StakeBatcher(window=0, max_ops=1)
+        submit = asyncio.ensure_future(batcher.submit("c1", StakeOp("u1", 1)))
+        await asyncio.sleep(0)
+        assert len(batcher._tasks) == 1
+        await submit
+        await asyncio.sleep(0)
+        assert not batcher._tasks
+
+    asyncio.run(run())